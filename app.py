@@ -1,11 +1,12 @@
 import streamlit as st
 import pandas as pd
-import random
 import json
 import os
 from character import Character
 from data_manager import DataManager
-from dnd_data import races, classes, backgrounds, ability_descriptions
+from party_builder import make_member, score_party, suggest_party
+from roll_log import DiceRoller, RollLog, ROLL_LOG_FILE, replay_session
+from dnd_data import races, classes, backgrounds, ability_descriptions, PRIMARY_ABILITY_THRESHOLD
 
 # Set page configuration
 st.set_page_config(
@@ -27,13 +28,251 @@ if 'loaded_message' not in st.session_state:
 # Create data manager instance
 data_manager = DataManager()
 
+# Seeded dice roller of this session; every roll is appended to the roll log
+if 'dice_roller' not in st.session_state:
+    st.session_state.dice_roller = DiceRoller(RollLog(os.path.join(data_manager.data_dir, ROLL_LOG_FILE)))
+
+# Number of characters shown per page of the roster
+ROSTER_PAGE_SIZE = 25
+
+
+def roll_ability_scores(character_name):
+    """Roll new ability scores for the character in session state."""
+    ability_scores = st.session_state.dice_roller.roll_ability_scores(character_name)
+    
+    # Update character with new rolls
+    st.session_state.character.ability_scores = ability_scores
+
+
+# Панель характеристик перезапускается отдельно: бросок костей не перерисовывает всю страницу
+@st.fragment
+def ability_scores_panel(selected_race, name):
+    """Show ability scores with racial bonuses and the dice roll button."""
+    st.header("Характеристики")
+    
+    # Generate ability scores button
+    st.button("Бросить кости характеристик", on_click=roll_ability_scores, args=(name,))
+    
+    # Display current ability scores and modifiers
+    ability_scores = st.session_state.character.ability_scores
+    
+    if not ability_scores:
+        st.info("Нажмите 'Бросить кости характеристик' для генерации случайных значений по правилам D&D (4d6, убрать наименьшее).")
+    else:
+        # Русские названия характеристик
+        ability_names_ru = {
+            "Strength": "Сила",
+            "Dexterity": "Ловкость",
+            "Constitution": "Телосложение",
+            "Intelligence": "Интеллект",
+            "Wisdom": "Мудрость",
+            "Charisma": "Харизма"
+        }
+        
+        for ability, score in ability_scores.items():
+            # Calculate racial bonus if any
+            racial_bonus = races[selected_race]['ability_bonuses'].get(ability, 0)
+            total_score = score + racial_bonus
+            modifier = (total_score - 10) // 2
+            
+            # Display ability with modifier and explanation
+            modifier_display = f"+{modifier}" if modifier >= 0 else f"{modifier}"
+            
+            st.markdown(f"**{ability_names_ru[ability]}: {total_score}** ({score} + {racial_bonus} расовый бонус) [Модификатор: {modifier_display}]")
+            st.caption(ability_descriptions[ability])
+    
+    # Журнал бросков сессии читается только по запросу
+    dice_roller = st.session_state.dice_roller
+    if st.toggle("Показать журнал бросков"):
+        rolls = dice_roller.log.query(session=dice_roller.session)
+        # Сид не показывается: по нему можно предсказать следующие броски; он есть в журнале для проверки
+        st.caption(f"Сессия {dice_roller.session}")
+        if len(rolls):
+            ability_names = ["Сила", "Ловкость", "Телосложение", "Интеллект", "Мудрость", "Харизма"]
+            st.dataframe(pd.DataFrame({
+                '№': rolls['sequence'],
+                'Характеристика': [ability_names[index] for index in rolls['ability']],
+                'Кости': [", ".join(map(str, record['dice'][:record['dice_count']])) for record in rolls]
+            }), use_container_width=True, hide_index=True)
+            
+            # Повторное воспроизведение бросков из сида сессии
+            mismatches = replay_session(rolls)
+            if mismatches:
+                st.error(f"Не совпадает с воспроизведением: {mismatches} бросков")
+            else:
+                st.success("Все броски совпадают с воспроизведением по сиду сессии")
+
+
+# Список персонажей перезапускается отдельно: листание и загрузка не затрагивают остальную страницу
+@st.fragment
+def roster_browser():
+    """Show the saved roster page by page and load the selected character."""
+    # Get all saved characters, sorted by name for stable paging
+    saved_characters = sorted(data_manager.get_saved_characters(), key=lambda char: char['name'])
+    
+    if not saved_characters:
+        st.info("Сохраненных персонажей не найдено. Сначала создайте нового персонажа!")
+    else:
+        # Русские названия столбцов
+        column_names = {
+            'name': 'Имя',
+            'race': 'Раса',
+            'character_class': 'Класс',
+            'level': 'Уровень'
+        }
+        
+        # Разбиение списка персонажей на страницы
+        page_count = (len(saved_characters) + ROSTER_PAGE_SIZE - 1) // ROSTER_PAGE_SIZE
+        roster_page = 1
+        if page_count > 1:
+            roster_page = st.number_input(f"Страница (всего {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+        page_characters = saved_characters[(roster_page - 1) * ROSTER_PAGE_SIZE:roster_page * ROSTER_PAGE_SIZE]
+        
+        # Display characters in a table
+        characters_df = pd.DataFrame(page_characters)
+        # Создаем копию с переименованными столбцами для отображения
+        display_df = characters_df[['name', 'race', 'character_class', 'level']].copy()
+        display_df.columns = [column_names[col] for col in display_df.columns]
+        st.dataframe(display_df, use_container_width=True)
+        
+        # Select character to load
+        selected_character_name = st.selectbox("Выберите персонажа для загрузки", 
+                                              [char['name'] for char in page_characters])
+        
+        if st.button("Загрузить выбранного персонажа"):
+            # Find the selected character data
+            selected_char_data = next((char for char in page_characters if char['name'] == selected_character_name), None)
+            
+            if selected_char_data:
+                # Load character into session state; the character references the
+                # shared immutable snapshot instead of copying it
+                st.session_state.character = Character(**selected_char_data)
+                st.session_state.loaded_message = f"Персонаж '{selected_character_name}' успешно загружен!"
+                st.success(st.session_state.loaded_message)
+                
+                # Show character details
+                st.subheader("Детали персонажа")
+                col1, col2 = st.columns(2)
+                
+                # Русские названия характеристик
+                ability_names_ru = {
+                    "Strength": "Сила",
+                    "Dexterity": "Ловкость",
+                    "Constitution": "Телосложение",
+                    "Intelligence": "Интеллект",
+                    "Wisdom": "Мудрость",
+                    "Charisma": "Харизма"
+                }
+                
+                with col1:
+                    st.write(f"**Имя:** {selected_char_data['name']}")
+                    st.write(f"**Раса:** {selected_char_data['race']}")
+                    st.write(f"**Класс:** {selected_char_data['character_class']}")
+                    st.write(f"**Предыстория:** {selected_char_data['background']}")
+                
+                with col2:
+                    st.write("**Характеристики:**")
+                    for ability, score in selected_char_data['ability_scores'].items():
+                        modifier = (score - 10) // 2
+                        modifier_display = f"+{modifier}" if modifier >= 0 else f"{modifier}"
+                        st.write(f"- {ability_names_ru[ability]}: {score} [{modifier_display}]")
+                
+                st.subheader("Стартовое снаряжение")
+                if selected_char_data['character_class']:
+                    equipment = classes[selected_char_data['character_class']]['starting_equipment']
+                    for item in equipment:
+                        st.write(f"• {item}")
+                
+                # Кнопка экспорта в TXT
+                st.markdown("---")
+                st.subheader("📤 Экспорт персонажа")
+                
+                # Создание текстового представления персонажа
+                txt_content = f"""═══════════════════════════════════════════════════════════════
+                ЛИСТ ПЕРСОНАЖА D&D 5e
+═══════════════════════════════════════════════════════════════
+
+ИМЯ ПЕРСОНАЖА: {selected_char_data['name']}
+РАСА: {selected_char_data['race']}
+КЛАСС: {selected_char_data['character_class']}
+ПРЕДЫСТОРИЯ: {selected_char_data['background']}
+УРОВЕНЬ: {selected_char_data['level']}
+
+═══════════════════════════════════════════════════════════════
+                         ХАРАКТЕРИСТИКИ
+═══════════════════════════════════════════════════════════════
+
+"""
+                # Добавляем характеристики
+                for ability, score in selected_char_data['ability_scores'].items():
+                    modifier = (score - 10) // 2
+                    modifier_display = f"+{modifier}" if modifier >= 0 else f"{modifier}"
+                    txt_content += f"{ability_names_ru[ability].upper()}: {score} (модификатор: {modifier_display})\n"
+                
+                txt_content += f"""
+═══════════════════════════════════════════════════════════════
+                      СТАРТОВОЕ СНАРЯЖЕНИЕ
+═══════════════════════════════════════════════════════════════
+
+"""
+                # Добавляем снаряжение
+                if selected_char_data['character_class']:
+                    equipment = classes[selected_char_data['character_class']]['starting_equipment']
+                    for item in equipment:
+                        txt_content += f"• {item}\n"
+                
+                txt_content += f"""
+═══════════════════════════════════════════════════════════════
+                        ОПИСАНИЯ РАС И КЛАССОВ
+═══════════════════════════════════════════════════════════════
+
+РАСА - {selected_char_data['race']}:
+{races[selected_char_data['race']]['description']}
+
+КЛАСС - {selected_char_data['character_class']}:
+{classes[selected_char_data['character_class']]['description']}
+
+ПРЕДЫСТОРИЯ - {selected_char_data['background']}:
+{backgrounds[selected_char_data['background']]['description']}
+
+═══════════════════════════════════════════════════════════════
+Создано с помощью Генератора персонажей D&D 5e
+═══════════════════════════════════════════════════════════════
+"""
+                
+                # Предоставляем файл для скачивания
+                st.download_button(
+                    label="💾 Скачать лист персонажа",
+                    data=txt_content,
+                    file_name=f"{selected_char_data['name']}_dnd_character.txt",
+                    mime="text/plain",
+                    help="Нажмите, чтобы скачать файл с данными персонажа на ваше устройство"
+                )
+            else:
+                st.error("Ошибка загрузки персонажа. Пожалуйста, попробуйте снова.")
+
+
+def show_party(party):
+    """Show party members and the balance score breakdown."""
+    result = score_party(party)
+    st.metric("Оценка баланса", f"{result['score']:.0f} / 100")
+    st.dataframe(pd.DataFrame({
+        'Имя': [member.name for member in party],
+        'Класс': [member.character_class for member in party],
+        'Сумма модификаторов основных характеристик': [member.modifier_total for member in party]
+    }), use_container_width=True)
+    st.write(f"**Закрытые роли:** {', '.join(result['covered_roles']) or '—'}")
+    if result['missing_roles']:
+        st.write(f"**Не хватает ролей:** {', '.join(result['missing_roles'])}")
+
+
 # Main title
 st.title("🎲 Генератор персонажей D&D")
 
 # Sidebar for navigation
 with st.sidebar:
     st.header("Навигация")
-    page = st.radio("", ["Создать персонажа", "Загрузить персонажа"])
+    page = st.radio("", ["Создать персонажа", "Загрузить персонажа", "Статистика", "Сбор группы"])
     
     st.header("О программе")
     st.write("Это приложение помогает создавать и управлять персонажами для Dungeons & Dragons 5-й редакции.")
@@ -99,50 +338,9 @@ if page == "Создать персонажа":
         
         if selected_background:
             st.write(f"**Особенности предыстории:** {backgrounds[selected_background]['description']}")
-        
-        # Generate ability scores button
-        if st.button("Бросить кости характеристик"):
-            ability_scores = {}
-            for ability in ["Strength", "Dexterity", "Constitution", "Intelligence", "Wisdom", "Charisma"]:
-                # Roll 4d6, remove lowest die
-                rolls = [random.randint(1, 6) for _ in range(4)]
-                rolls.sort(reverse=True)
-                ability_scores[ability] = sum(rolls[:3])
-            
-            # Update character with new rolls
-            st.session_state.character.ability_scores = ability_scores
-            st.rerun()
     
     with col2:
-        st.header("Характеристики")
-        
-        # Display current ability scores and modifiers
-        ability_scores = st.session_state.character.ability_scores
-        
-        if not ability_scores:
-            st.info("Нажмите 'Бросить кости характеристик' для генерации случайных значений по правилам D&D (4d6, убрать наименьшее).")
-        else:
-            # Русские названия характеристик
-            ability_names_ru = {
-                "Strength": "Сила",
-                "Dexterity": "Ловкость",
-                "Constitution": "Телосложение",
-                "Intelligence": "Интеллект",
-                "Wisdom": "Мудрость",
-                "Charisma": "Харизма"
-            }
-            
-            for ability, score in ability_scores.items():
-                # Calculate racial bonus if any
-                racial_bonus = races[selected_race]['ability_bonuses'].get(ability, 0)
-                total_score = score + racial_bonus
-                modifier = (total_score - 10) // 2
-                
-                # Display ability with modifier and explanation
-                modifier_display = f"+{modifier}" if modifier >= 0 else f"{modifier}"
-                
-                st.markdown(f"**{ability_names_ru[ability]}: {total_score}** ({score} + {racial_bonus} расовый бонус) [Модификатор: {modifier_display}]")
-                st.caption(ability_descriptions[ability])
+        ability_scores_panel(selected_race, name)
         
         st.markdown("---")
         
@@ -175,9 +373,7 @@ if page == "Создать персонажа":
             error_messages.append("• Сначала сгенерируйте характеристики кнопкой 'Бросить кости характеристик'")
         
         # Проверка существования файла для предупреждения о перезаписи
-        import os
-        safe_name = "".join(x for x in name if x.isalnum() or x in " _-").replace(" ", "_")
-        if safe_name and os.path.exists(f"character_data/{safe_name}.json"):
+        if data_manager.character_exists(name):
             st.warning(f"⚠️ Персонаж с именем '{name}' уже существует. При сохранении он будет перезаписан.")
         
         if error_messages:
@@ -284,138 +480,108 @@ if page == "Создать персонажа":
 elif page == "Загрузить персонажа":
     st.header("Загрузить персонажа")
     
-    # Get all saved characters
-    saved_characters = data_manager.get_saved_characters()
+    # Файлы, не прошедшие проверку, перемещаются в карантин
+    quarantined_files = data_manager.get_quarantined_files()
+    if quarantined_files:
+        with st.expander(f"⚠️ Поврежденные файлы в карантине: {len(quarantined_files)}"):
+            for filename, errors in quarantined_files.items():
+                st.write(f"**{filename}**: {'; '.join(errors)}")
     
-    if not saved_characters:
+    roster_browser()
+
+# Statistics Page
+elif page == "Статистика":
+    st.header("Статистика персонажей")
+    
+    # Агрегаты обновляются при каждом сохранении и удалении, файлы персонажей здесь не перечитываются
+    stats = data_manager.get_roster_aggregates().summary()
+    
+    if not stats['total']:
         st.info("Сохраненных персонажей не найдено. Сначала создайте нового персонажа!")
     else:
-        # Русские названия столбцов
-        column_names = {
-            'name': 'Имя',
-            'race': 'Раса',
-            'character_class': 'Класс',
-            'level': 'Уровень'
+        # Русские названия характеристик
+        ability_names_ru = {
+            "Strength": "Сила",
+            "Dexterity": "Ловкость",
+            "Constitution": "Телосложение",
+            "Intelligence": "Интеллект",
+            "Wisdom": "Мудрость",
+            "Charisma": "Харизма"
         }
         
-        # Display characters in a table
-        characters_df = pd.DataFrame(saved_characters)
-        # Создаем копию с переименованными столбцами для отображения
-        display_df = characters_df[['name', 'race', 'character_class', 'level']].copy()
-        display_df.columns = [column_names[col] for col in display_df.columns]
-        st.dataframe(display_df, use_container_width=True)
+        col1, col2 = st.columns(2)
+        col1.metric("Всего персонажей", stats['total'])
+        col2.metric(f"Основные характеристики не ниже {PRIMARY_ABILITY_THRESHOLD}", f"{stats['primary_met_total']:.0%}")
         
-        # Select character to load
-        selected_character_name = st.selectbox("Выберите персонажа для загрузки", 
-                                              [char['name'] for char in saved_characters])
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Распределение рас")
+            st.bar_chart(pd.Series(stats['race_counts'], name="Персонажей"))
+        with col2:
+            st.subheader("Распределение классов")
+            st.bar_chart(pd.Series(stats['class_counts'], name="Персонажей"))
         
-        if st.button("Загрузить выбранного персонажа"):
-            # Find the selected character data
-            selected_char_data = next((char for char in saved_characters if char['name'] == selected_character_name), None)
-            
-            if selected_char_data:
-                # Load character into session state
-                st.session_state.character = Character(**selected_char_data)
-                st.session_state.loaded_message = f"Персонаж '{selected_character_name}' успешно загружен!"
-                st.success(st.session_state.loaded_message)
-                
-                # Show character details
-                st.subheader("Детали персонажа")
-                col1, col2 = st.columns(2)
-                
-                # Русские названия характеристик
-                ability_names_ru = {
-                    "Strength": "Сила",
-                    "Dexterity": "Ловкость",
-                    "Constitution": "Телосложение",
-                    "Intelligence": "Интеллект",
-                    "Wisdom": "Мудрость",
-                    "Charisma": "Харизма"
-                }
-                
-                with col1:
-                    st.write(f"**Имя:** {selected_char_data['name']}")
-                    st.write(f"**Раса:** {selected_char_data['race']}")
-                    st.write(f"**Класс:** {selected_char_data['character_class']}")
-                    st.write(f"**Предыстория:** {selected_char_data['background']}")
-                
-                with col2:
-                    st.write("**Характеристики:**")
-                    for ability, score in selected_char_data['ability_scores'].items():
-                        modifier = (score - 10) // 2
-                        modifier_display = f"+{modifier}" if modifier >= 0 else f"{modifier}"
-                        st.write(f"- {ability_names_ru[ability]}: {score} [{modifier_display}]")
-                
-                st.subheader("Стартовое снаряжение")
-                if selected_char_data['character_class']:
-                    equipment = classes[selected_char_data['character_class']]['starting_equipment']
-                    for item in equipment:
-                        st.write(f"• {item}")
-                
-                # Кнопка экспорта в TXT
-                st.markdown("---")
-                st.subheader("📤 Экспорт персонажа")
-                
-                # Создание текстового представления персонажа
-                txt_content = f"""═══════════════════════════════════════════════════════════════
-                ЛИСТ ПЕРСОНАЖА D&D 5e
-═══════════════════════════════════════════════════════════════
-
-ИМЯ ПЕРСОНАЖА: {selected_char_data['name']}
-РАСА: {selected_char_data['race']}
-КЛАСС: {selected_char_data['character_class']}
-ПРЕДЫСТОРИЯ: {selected_char_data['background']}
-УРОВЕНЬ: {selected_char_data['level']}
-
-═══════════════════════════════════════════════════════════════
-                         ХАРАКТЕРИСТИКИ
-═══════════════════════════════════════════════════════════════
-
-"""
-                # Добавляем характеристики
-                for ability, score in selected_char_data['ability_scores'].items():
-                    modifier = (score - 10) // 2
-                    modifier_display = f"+{modifier}" if modifier >= 0 else f"{modifier}"
-                    txt_content += f"{ability_names_ru[ability].upper()}: {score} (модификатор: {modifier_display})\n"
-                
-                txt_content += f"""
-═══════════════════════════════════════════════════════════════
-                      СТАРТОВОЕ СНАРЯЖЕНИЕ
-═══════════════════════════════════════════════════════════════
-
-"""
-                # Добавляем снаряжение
-                if selected_char_data['character_class']:
-                    equipment = classes[selected_char_data['character_class']]['starting_equipment']
-                    for item in equipment:
-                        txt_content += f"• {item}\n"
-                
-                txt_content += f"""
-═══════════════════════════════════════════════════════════════
-                        ОПИСАНИЯ РАС И КЛАССОВ
-═══════════════════════════════════════════════════════════════
-
-РАСА - {selected_char_data['race']}:
-{races[selected_char_data['race']]['description']}
-
-КЛАСС - {selected_char_data['character_class']}:
-{classes[selected_char_data['character_class']]['description']}
-
-ПРЕДЫСТОРИЯ - {selected_char_data['background']}:
-{backgrounds[selected_char_data['background']]['description']}
+        # Гистограмма итоговых значений (с расовыми бонусами) для выбранной характеристики
+        st.subheader("Значения характеристик")
+        selected_ability = st.selectbox("Характеристика", list(ability_names_ru), format_func=lambda ability: ability_names_ru[ability])
+        histogram = stats['score_histograms'][selected_ability]
+        st.bar_chart(pd.Series(histogram[1:], index=range(1, len(histogram)), name="Персонажей"))
+        
+        st.subheader("Средние модификаторы по классам")
+        st.caption("С учетом расовых бонусов. Последний столбец — доля персонажей класса, "
+                   f"у которых все основные характеристики не ниже {PRIMARY_ABILITY_THRESHOLD}.")
+        modifiers_df = pd.DataFrame.from_dict(stats['average_modifiers'], orient='index')
+        modifiers_df.columns = [ability_names_ru[col] for col in modifiers_df.columns]
+        modifiers_df = modifiers_df.round(2)
+        modifiers_df["Основные в норме, %"] = (pd.Series(stats['primary_met_share']) * 100).round(1)
+        st.dataframe(modifiers_df, use_container_width=True)
 
-═══════════════════════════════════════════════════════════════
-Создано с помощью Генератора персонажей D&D 5e
-═══════════════════════════════════════════════════════════════
-"""
-                
-                # Предоставляем файл для скачивания
-                st.download_button(
-                    label="💾 Скачать лист персонажа",
-                    data=txt_content,
-                    file_name=f"{selected_char_data['name']}_dnd_character.txt",
-                    mime="text/plain",
-                    help="Нажмите, чтобы скачать файл с данными персонажа на ваше устройство"
-                )
+# Party Builder Page
+elif page == "Сбор группы":
+    st.header("Сбор группы")
+    
+    # Векторы персонажей (роли, основные характеристики, модификаторы) считаются один раз на версию файла
+    # и хранятся рядом со снимком в общем кэше
+    saved_files = sorted(data_manager.get_saved_character_files(), key=lambda item: (item[2]['name'], item[0]))
+    # Персонажи различаются по имени файла: имена у разных персонажей могут совпадать
+    members_by_file = {filename: data_manager.get_derived(filename, version, "party_member",
+                                                          lambda char=char: make_member(char))
+                       for filename, version, char in saved_files}
+    members = list(members_by_file.values())
+    
+    def member_label(filename):
+        member = members_by_file[filename]
+        return f"{member.name} ({member.character_class}, {filename})"
+    
+    if not members:
+        st.info("Сохраненных персонажей не найдено. Сначала создайте нового персонажа!")
+    else:
+        # Оценка группы, собранной вручную
+        st.subheader("Своя группа")
+        selected_files = st.multiselect("Участники группы", list(members_by_file), format_func=member_label,
+                                        max_selections=6)
+        if selected_files:
+            show_party([members_by_file[filename] for filename in selected_files])
+        
+        # Подбор лучшей группы из пула кандидатов
+        st.markdown("---")
+        st.subheader("Подобрать группу")
+        party_size = st.slider("Размер группы", min_value=4, max_value=6, value=4)
+        pool_files = st.multiselect("Пул кандидатов (пусто — все сохраненные персонажи)", list(members_by_file),
+                                    format_func=member_label)
+        pool = [members_by_file[filename] for filename in pool_files] if pool_files else members
+        
+        if st.button("Подобрать лучшую группу"):
+            best_party = suggest_party(pool, party_size)
+            if best_party:
+                show_party(best_party)
             else:
-                st.error("Ошибка загрузки персонажа. Пожалуйста, попробуйте снова.")
+                st.warning(f"В пуле меньше {party_size} персонажей.")
+
+# Статистика общего кэша персонажей (выводится в конце, чтобы учесть текущий запуск)
+with st.sidebar:
+    cache_stats = data_manager.cache.stats()
+    with st.expander("Кэш персонажей"):
+        st.write(f"Записей: {cache_stats['entries']}")
+        st.write(f"Объем: {cache_stats['size_bytes'] / 1024:.1f} из {cache_stats['max_bytes'] / 1024:.0f} КБ")
+        st.write(f"Попадания: {cache_stats['hits']}, промахи: {cache_stats['misses']}, вытеснения: {cache_stats['evictions']}")
@@ -0,0 +1,235 @@
+"""Incremental content-addressed backups of saved characters.
+
+Usage:
+    python backup.py backup --store backups
+    python backup.py list --store backups
+    python backup.py restore latest --store backups
+    python backup.py restore latest --exact
+    python backup.py restore 20261019T120000123456Z --character "Имя персонажа"
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+from character_codec import is_character_file, strip_extension
+from data_manager import character_paths, safe_file_stem
+
+
+class BackupStore:
+    """Local directory holding deduplicated character files and snapshot manifests."""
+
+    def __init__(self, store_dir="backups"):
+        """
+        Initialize the backup store.
+
+        Args:
+            store_dir (str): Directory of the store; created if missing
+        """
+        self.store_dir = store_dir
+        self.objects_dir = os.path.join(store_dir, "objects")
+        self.snapshots_dir = os.path.join(store_dir, "snapshots")
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+
+    def backup(self, data_dir="character_data"):
+        """
+        Back up all character files and write a snapshot manifest.
+
+        Files whose size and modification time match the latest snapshot of
+        the same data directory are not re-read, and content already in the
+        store is not copied again.
+
+        Args:
+            data_dir (str): Directory with saved characters
+
+        Returns:
+            dict: Snapshot id, number of files, number and bytes of newly stored objects
+        """
+        data_dir_path = os.path.abspath(data_dir)
+        previous = {}
+        for snapshot_id in reversed(self.list_snapshots()):
+            manifest = self.load_manifest(snapshot_id)
+            if manifest["data_dir"] == data_dir_path:
+                previous = manifest["files"]
+                break
+
+        files = {}
+        copied = 0
+        bytes_copied = 0
+
+        for filename in sorted(os.listdir(data_dir)):
+            if not is_character_file(filename):
+                continue
+
+            file_path = os.path.join(data_dir, filename)
+            try:
+                stat = os.stat(file_path)
+                entry = previous.get(filename)
+
+                if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                    digest = entry["hash"]
+                else:
+                    with open(file_path, 'rb') as f:
+                        data = f.read()
+                    digest = hashlib.sha256(data).hexdigest()
+                    if self._store_object(digest, data):
+                        copied += 1
+                        bytes_copied += len(data)
+            except FileNotFoundError:
+                # Deleted since the directory was listed
+                continue
+
+            files[filename] = {"hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+        snapshot_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        manifest = {
+            "id": snapshot_id,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "data_dir": data_dir_path,
+            "files": files
+        }
+        self._write_atomic(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"),
+                           json.dumps(manifest, indent=4, ensure_ascii=False).encode("utf-8"))
+
+        return {"id": snapshot_id, "files": len(files), "copied": copied, "bytes_copied": bytes_copied}
+
+    def list_snapshots(self):
+        """
+        Get the ids of all snapshots, oldest first.
+
+        Returns:
+            list: Snapshot ids
+        """
+        return sorted(filename[:-len(".json")] for filename in os.listdir(self.snapshots_dir)
+                      if filename.endswith(".json"))
+
+    def load_manifest(self, snapshot_id):
+        """
+        Read a snapshot manifest.
+
+        Args:
+            snapshot_id (str): Snapshot id, or "latest" for the most recent one
+
+        Returns:
+            dict: Manifest with the "files" mapping of file name to hash, size and mtime
+        """
+        if snapshot_id == "latest":
+            snapshots = self.list_snapshots()
+            if not snapshots:
+                raise FileNotFoundError("No snapshots in the backup store")
+            snapshot_id = snapshots[-1]
+
+        with open(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def restore(self, snapshot_id, target_dir="character_data", character_name=None, exact=False):
+        """
+        Restore a snapshot, or a single character from it, into a directory.
+
+        A restored character replaces its copies in other storage formats.
+        Characters that are not in the snapshot are kept unless exact is set.
+
+        Args:
+            snapshot_id (str): Snapshot id, or "latest"
+            target_dir (str): Directory to restore into
+            character_name (str): Restore only this character (name or file name)
+            exact (bool): For a full restore, also remove character files that
+                are not in the snapshot
+
+        Returns:
+            list: Names of the restored files
+        """
+        files = self.load_manifest(snapshot_id)["files"]
+
+        if character_name is not None:
+            wanted = safe_file_stem(character_name)
+            files = {filename: entry for filename, entry in files.items()
+                     if filename == character_name or strip_extension(filename) == wanted}
+            if not files:
+                raise KeyError(f"Character '{character_name}' is not in snapshot {snapshot_id}")
+
+        os.makedirs(target_dir, exist_ok=True)
+        for filename, entry in files.items():
+            target_path = os.path.join(target_dir, filename)
+            temp_path = f"{target_path}.tmp"
+            shutil.copyfile(self._object_path(entry["hash"]), temp_path)
+            os.replace(temp_path, target_path)
+
+            # Drop copies of the same character stored in other formats
+            for path in character_paths(target_dir, strip_extension(filename)):
+                if path != target_path:
+                    os.remove(path)
+
+        if character_name is None and exact:
+            for filename in os.listdir(target_dir):
+                if is_character_file(filename) and filename not in files:
+                    os.remove(os.path.join(target_dir, filename))
+
+        return sorted(files)
+
+    def _object_path(self, digest):
+        """Path of a stored object, fanned out by the first two hex digits."""
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _store_object(self, digest, data):
+        """
+        Store content under its hash unless it is already present.
+
+        Returns:
+            bool: True if the object was newly written
+        """
+        object_path = self._object_path(digest)
+        if os.path.exists(object_path):
+            return False
+
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        self._write_atomic(object_path, data)
+        return True
+
+    def _write_atomic(self, path, data):
+        """Write bytes to a temporary file and move it into place."""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up and restore saved characters.")
+    store_parser = argparse.ArgumentParser(add_help=False)
+    store_parser.add_argument("--store", default="backups", help="Backup store directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backup_parser = subparsers.add_parser("backup", parents=[store_parser], help="Create a new snapshot")
+    backup_parser.add_argument("--data-dir", default="character_data", help="Directory with saved characters")
+
+    subparsers.add_parser("list", parents=[store_parser], help="List snapshots")
+
+    restore_parser = subparsers.add_parser("restore", parents=[store_parser], help="Restore a snapshot")
+    restore_parser.add_argument("snapshot", help="Snapshot id or 'latest'")
+    restore_parser.add_argument("--target", default="character_data", help="Directory to restore into")
+    restore_parser.add_argument("--character", help="Restore only this character")
+    restore_parser.add_argument("--exact", action="store_true",
+                                help="Remove characters that are not in the snapshot")
+
+    args = parser.parse_args()
+    store = BackupStore(args.store)
+
+    if args.command == "backup":
+        result = store.backup(args.data_dir)
+        print(f"Snapshot {result['id']}: {result['files']} files, "
+              f"{result['copied']} new objects ({result['bytes_copied']} bytes)")
+    elif args.command == "list":
+        for snapshot_id in store.list_snapshots():
+            print(f"{snapshot_id}\t{len(store.load_manifest(snapshot_id)['files'])} files")
+    else:
+        restored = store.restore(args.snapshot, args.target, args.character, args.exact)
+        print(f"Restored {len(restored)} files into {args.target}")
+
+
+if __name__ == "__main__":
+    main()
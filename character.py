@@ -33,7 +33,7 @@ class Character:
             "race": self.race,
             "character_class": self.character_class,
             "background": self.background,
-            "ability_scores": self.ability_scores,
+            "ability_scores": dict(self.ability_scores),
             "level": self.level
         }
     
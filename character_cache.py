@@ -0,0 +1,236 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+# Default memory budget for the shared cache, overridable via environment
+DEFAULT_MAX_BYTES = int(os.environ.get("CHARACTER_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+
+
+def freeze_character(character_dict):
+    """
+    Build an immutable snapshot of a character dictionary.
+
+    Args:
+        character_dict (dict): Character data as read from storage
+
+    Returns:
+        MappingProxyType: Read-only view of the character data
+    """
+    frozen = dict(character_dict)
+    frozen["ability_scores"] = MappingProxyType(dict(character_dict.get("ability_scores") or {}))
+    return MappingProxyType(frozen)
+
+
+def estimate_size(obj):
+    """
+    Roughly estimate the memory footprint of a snapshot in bytes.
+
+    Args:
+        obj: Object to measure (mappings, sequences and scalars are supported)
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (dict, MappingProxyType)):
+        for key, value in obj.items():
+            size += sys.getsizeof(key) + estimate_size(value)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            size += estimate_size(item)
+    return size
+
+
+class CharacterCache:
+    """
+    Thread-safe LRU cache of immutable character snapshots with a byte budget.
+
+    Besides the snapshots, the cache remembers which version of each key was
+    validated. That index is small and not subject to the byte budget, so a
+    roster larger than the budget is re-read after eviction but not
+    re-validated.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes (int): Memory budget; least recently used entries are evicted beyond it
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._validated = {}
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        """
+        Return the cached snapshot for a key if it matches the given version.
+
+        Args:
+            key (str): Cache key, usually the character file path
+            version: Version stamp of the stored data (e.g. mtime and size)
+
+        Returns:
+            MappingProxyType: Cached snapshot or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, character_dict):
+        """
+        Store a snapshot of a character, evicting old entries if over budget.
+
+        Args:
+            key (str): Cache key, usually the character file path
+            version: Version stamp of the stored data
+            character_dict (dict): Character data to snapshot
+
+        Returns:
+            MappingProxyType: The stored snapshot
+        """
+        snapshot = freeze_character(character_dict)
+        size = estimate_size(snapshot)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (version, snapshot, size, {})
+            self._validated[key] = version
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest_key = next(iter(self._entries))
+                self._discard(oldest_key)
+                self.evictions += 1
+        return snapshot
+
+    def get_derived(self, key, version, name, factory):
+        """
+        Return a value computed from a cached snapshot, computing it once per version.
+
+        Derived values live next to the snapshot and are dropped with it; if
+        the snapshot is not cached, the value is computed but not kept.
+
+        Args:
+            key (str): Cache key, usually the character file path
+            version: Version stamp of the stored data
+            name (str): Name of the derived value, e.g. "party_member"
+            factory (callable): Function computing the value on a miss
+
+        Returns:
+            The derived value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and name in entry[3]:
+                return entry[3][name]
+
+        value = factory()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                entry[3][name] = value
+        return value
+
+    def is_validated(self, key, version):
+        """
+        Check whether this version of a key was validated before, even if evicted.
+
+        Args:
+            key (str): Cache key, usually the character file path
+            version: Version stamp of the stored data
+
+        Returns:
+            bool: True if a snapshot of exactly this version was stored
+        """
+        with self._lock:
+            return self._validated.get(key) == version
+
+    def get_or_load(self, key, version, loader):
+        """
+        Return a cached snapshot or load, snapshot and cache it.
+
+        Args:
+            key (str): Cache key, usually the character file path
+            version: Version stamp of the stored data
+            loader (callable): Function returning the character dictionary on a miss
+
+        Returns:
+            MappingProxyType: Character snapshot
+        """
+        snapshot = self.get(key, version)
+        if snapshot is None:
+            snapshot = self.put(key, version, loader())
+        return snapshot
+
+    def invalidate(self, key):
+        """
+        Drop a key from the cache.
+
+        Args:
+            key (str): Cache key to remove
+        """
+        with self._lock:
+            self._discard(key)
+            self._validated.pop(key, None)
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._validated.clear()
+            self.size_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        Get cache usage statistics.
+
+        Returns:
+            dict: Entry count, size and budget in bytes, hits, misses and evictions
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+    def _discard(self, key):
+        """Remove an entry without locking; the caller must hold the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[2]
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache():
+    """
+    Get the process-wide character cache shared by all sessions.
+
+    Returns:
+        CharacterCache: Shared cache instance
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = CharacterCache()
+        return _shared_cache
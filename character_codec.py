@@ -0,0 +1,171 @@
+import gzip
+import json
+import lzma
+import struct
+
+from character_schema import ABILITIES
+
+# Storage format name -> file extension
+FORMAT_EXTENSIONS = {
+    "json": ".json",
+    "compact": ".json",
+    "gzip": ".json.gz",
+    "lzma": ".json.xz",
+    "packed": ".dndc"
+}
+
+# All extensions that may hold a character, longest first so suffix checks are unambiguous
+CHARACTER_EXTENSIONS = (".json.gz", ".json.xz", ".dndc", ".json")
+
+GZIP_MAGIC = b"\x1f\x8b"
+LZMA_MAGIC = b"\xfd7zXZ\x00"
+PACKED_MAGIC = b"DNDC"
+PACKED_VERSION = 1
+
+# Packed record header: magic, version, six ability scores, level
+_PACKED_HEADER = struct.Struct("<4sB6BB")
+_PACKED_STRING_LENGTH = struct.Struct("<H")
+_PACKED_STRING_FIELDS = ("name", "race", "character_class", "background")
+
+
+def is_character_file(filename):
+    """Check whether a file name has one of the character storage extensions."""
+    return filename.endswith(CHARACTER_EXTENSIONS)
+
+
+def strip_extension(filename):
+    """
+    Remove the character storage extension from a file name.
+
+    Args:
+        filename (str): File name such as "Hero.json.gz"
+
+    Returns:
+        str: File name without the extension, e.g. "Hero"
+    """
+    for extension in CHARACTER_EXTENSIONS:
+        if filename.endswith(extension):
+            return filename[:-len(extension)]
+    return filename
+
+
+def _encode_json(character_dict, pretty):
+    """Serialize a character to UTF-8 JSON without escaping non-ASCII text."""
+    if pretty:
+        text = json.dumps(character_dict, indent=4, ensure_ascii=False)
+    else:
+        text = json.dumps(character_dict, separators=(",", ":"), ensure_ascii=False)
+    return text.encode("utf-8")
+
+
+def _encode_packed(character_dict):
+    """Pack a character into a compact binary record."""
+    ability_scores = character_dict.get("ability_scores") or {}
+    try:
+        header = _PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION,
+                                     *(ability_scores[ability] for ability in ABILITIES),
+                                     character_dict.get("level", 1))
+    except (KeyError, struct.error) as e:
+        raise ValueError(f"character cannot be packed: {e}") from e
+
+    parts = [header]
+    for field in _PACKED_STRING_FIELDS:
+        encoded = str(character_dict.get(field, "")).encode("utf-8")
+        parts.append(_PACKED_STRING_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def _decode_packed(data):
+    """Unpack a binary character record."""
+    magic, version, *values = _PACKED_HEADER.unpack_from(data)
+    if version != PACKED_VERSION:
+        raise ValueError(f"unsupported packed record version {version}")
+
+    character_dict = {}
+    offset = _PACKED_HEADER.size
+    for field in _PACKED_STRING_FIELDS:
+        (length,) = _PACKED_STRING_LENGTH.unpack_from(data, offset)
+        offset += _PACKED_STRING_LENGTH.size
+        if offset + length > len(data):
+            raise ValueError(f"truncated packed record in field '{field}'")
+        character_dict[field] = data[offset:offset + length].decode("utf-8")
+        offset += length
+    if offset != len(data):
+        raise ValueError(f"{len(data) - offset} trailing bytes after packed record")
+
+    character_dict["ability_scores"] = dict(zip(ABILITIES, values[:len(ABILITIES)]))
+    character_dict["level"] = values[len(ABILITIES)]
+    return character_dict
+
+
+def encode_character(character_dict, storage_format="json"):
+    """
+    Serialize a character dictionary in the given storage format.
+
+    Args:
+        character_dict (dict): Character data
+        storage_format (str): One of the keys of FORMAT_EXTENSIONS
+
+    Returns:
+        bytes: Encoded character
+    """
+    if storage_format == "json":
+        return _encode_json(character_dict, pretty=True)
+    if storage_format == "compact":
+        return _encode_json(character_dict, pretty=False)
+    if storage_format == "gzip":
+        # A fixed mtime keeps the output identical for identical characters
+        return gzip.compress(_encode_json(character_dict, pretty=False), mtime=0)
+    if storage_format == "lzma":
+        return lzma.compress(_encode_json(character_dict, pretty=False))
+    if storage_format == "packed":
+        return _encode_packed(character_dict)
+    raise ValueError(f"unknown storage format '{storage_format}'")
+
+
+def detect_format(data):
+    """
+    Detect the storage format of encoded character data.
+
+    Args:
+        data (bytes): Raw file contents
+
+    Returns:
+        str: "gzip", "lzma", "packed" or "json"
+    """
+    if data.startswith(GZIP_MAGIC):
+        return "gzip"
+    if data.startswith(LZMA_MAGIC):
+        return "lzma"
+    if data.startswith(PACKED_MAGIC):
+        return "packed"
+    return "json"
+
+
+def decode_character_data(data):
+    """
+    Decode a raw character record, detecting its storage format.
+
+    Args:
+        data (bytes): Raw file contents
+
+    Returns:
+        The decoded record (a dictionary for well-formed files)
+
+    Raises:
+        ValueError: If the data is corrupt or cannot be decoded
+    """
+    storage_format = detect_format(data)
+    try:
+        if storage_format == "gzip":
+            data = gzip.decompress(data)
+        elif storage_format == "lzma":
+            data = lzma.decompress(data)
+        elif storage_format == "packed":
+            return _decode_packed(data)
+        return json.loads(data.decode("utf-8"))
+    except ValueError:
+        raise
+    except (OSError, EOFError, lzma.LZMAError, struct.error) as e:
+        raise ValueError(f"corrupt {storage_format} data: {e}") from e
@@ -0,0 +1,171 @@
+from dnd_data import races, classes, backgrounds
+
+ABILITIES = ("Strength", "Dexterity", "Constitution", "Intelligence", "Wisdom", "Charisma")
+
+# Declarative description of a stored character record
+CHARACTER_SCHEMA = {
+    "name": {"type": str, "required": True, "max_length": 50},
+    "race": {"type": str, "required": True, "choices": races},
+    "character_class": {"type": str, "required": True, "choices": classes},
+    "background": {"type": str, "required": True, "choices": backgrounds},
+    "ability_scores": {"type": dict, "required": True, "keys": ABILITIES, "min": 1, "max": 30},
+    "level": {"type": int, "required": False, "default": 1, "min": 1, "max": 20}
+}
+
+
+class CharacterValidationError(ValueError):
+    """Raised when a stored character record does not match the schema."""
+
+    def __init__(self, errors):
+        """
+        Initialize the error with the list of problems found.
+
+        Args:
+            errors (list): Human-readable descriptions of each problem
+        """
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def _is_int(value):
+    """Check for a real integer, rejecting booleans."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _compile_field(field, spec):
+    """
+    Build a checker for one schema field.
+
+    Args:
+        field (str): Field name
+        spec (dict): Field specification from the schema
+
+    Returns:
+        tuple: (function taking a value and returning (converted value, errors),
+                function converting an already validated value)
+    """
+    expected_type = spec["type"]
+    choices = spec.get("choices")
+    max_length = spec.get("max_length")
+    keys = spec.get("keys")
+    low = spec.get("min")
+    high = spec.get("max")
+
+    def check_int(value, label):
+        if not _is_int(value):
+            return [f"{label}: expected an integer, got {type(value).__name__}"]
+        if low is not None and value < low or high is not None and value > high:
+            return [f"{label}: {value} is outside {low}..{high}"]
+        return []
+
+    if expected_type is str:
+        def check(value):
+            if not isinstance(value, str):
+                return None, [f"{field}: expected a string, got {type(value).__name__}"]
+            if max_length is not None and len(value) > max_length:
+                return None, [f"{field}: longer than {max_length} characters"]
+            if choices is not None and value not in choices:
+                return None, [f"{field}: unknown value '{value}'"]
+            return value, []
+    elif expected_type is int:
+        def check(value):
+            errors = check_int(value, field)
+            return (None if errors else value), errors
+    if expected_type is not dict:
+        return check, lambda value: value
+    else:
+        def check(value):
+            if not isinstance(value, dict):
+                return None, [f"{field}: expected an object, got {type(value).__name__}"]
+            errors = []
+            missing = [key for key in keys if key not in value]
+            unknown = [key for key in value if key not in keys]
+            if missing:
+                errors.append(f"{field}: missing {', '.join(missing)}")
+            if unknown:
+                errors.append(f"{field}: unknown {', '.join(str(key) for key in unknown)}")
+            for key in keys:
+                if key in value:
+                    errors.extend(check_int(value[key], f"{field}.{key}"))
+            if errors:
+                return None, errors
+            # Normalize key order so every decoded record looks the same
+            return normalize(value), []
+
+    def normalize(value):
+        return {key: value[key] for key in keys}
+
+    return check, normalize
+
+
+def compile_schema(schema):
+    """
+    Compile a schema into a decoder function.
+
+    The per-field checks are built once, so decoding a record only runs the
+    prepared checkers instead of interpreting the schema each time.
+
+    Args:
+        schema (dict): Mapping of field name to field specification
+
+    Returns:
+        callable: Function that takes a raw record and returns a clean dictionary
+            with only the schema fields, raising CharacterValidationError otherwise.
+            With validate=False the record is trusted to have passed before
+            (e.g. the same file version) and is only converted.
+    """
+    fields = [(field, spec.get("required", False), spec.get("default"), *_compile_field(field, spec))
+              for field, spec in schema.items()]
+
+    def decode(record, validate=True):
+        if not validate:
+            return {field: normalize(record[field]) if field in record else default
+                    for field, required, default, check, normalize in fields}
+
+        if not isinstance(record, dict):
+            raise CharacterValidationError([f"expected an object, got {type(record).__name__}"])
+
+        result = {}
+        errors = []
+        for field, required, default, check, normalize in fields:
+            if field not in record:
+                if required:
+                    errors.append(f"{field}: missing")
+                else:
+                    result[field] = default
+                continue
+            value, field_errors = check(record[field])
+            if field_errors:
+                errors.extend(field_errors)
+            else:
+                result[field] = value
+
+        if errors:
+            raise CharacterValidationError(errors)
+        return result
+
+    return decode
+
+
+decode_character = compile_schema(CHARACTER_SCHEMA)
+
+
+def decode_characters(records):
+    """
+    Validate and convert a batch of raw character records.
+
+    Args:
+        records (list): Raw records, e.g. parsed JSON objects
+
+    Returns:
+        tuple: (list of (index, clean dict) for valid records,
+                list of (index, list of errors) for invalid records)
+    """
+    valid = []
+    invalid = []
+    for index, record in enumerate(records):
+        try:
+            valid.append((index, decode_character(record)))
+        except CharacterValidationError as e:
+            invalid.append((index, e.errors))
+    return valid, invalid
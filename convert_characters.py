@@ -0,0 +1,26 @@
+"""Rewrite saved characters in another storage format.
+
+Usage:
+    python convert_characters.py compact
+    python convert_characters.py gzip --data-dir character_data
+"""
+import argparse
+
+from character_codec import FORMAT_EXTENSIONS
+from data_manager import DataManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert saved characters to another storage format.")
+    parser.add_argument("format", choices=sorted(FORMAT_EXTENSIONS), help="Target storage format")
+    parser.add_argument("--data-dir", default="character_data", help="Directory with saved characters")
+    args = parser.parse_args()
+
+    data_manager = DataManager(args.data_dir, storage_format=args.format)
+    converted, bytes_before, bytes_after = data_manager.convert_storage(args.format)
+
+    print(f"Converted {converted} characters to '{args.format}': {bytes_before} -> {bytes_after} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,79 @@
 import os
-import json
+import tempfile
 from character import Character
+from character_cache import get_shared_cache
+from character_codec import (FORMAT_EXTENSIONS, CHARACTER_EXTENSIONS, decode_character_data,
+                             encode_character, is_character_file, strip_extension)
+from character_schema import decode_character, decode_characters
+from roster_stats import get_roster_aggregates
+
+# Subdirectory of the data directory where invalid character files are moved
+QUARANTINE_DIR = "quarantine"
+
+# Format used for newly saved characters, see character_codec.FORMAT_EXTENSIONS
+DEFAULT_STORAGE_FORMAT = os.environ.get("CHARACTER_STORAGE_FORMAT", "json")
+
+# Process umask, applied to saved files like open() does (mkstemp creates them as 0600)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def safe_file_stem(character_name):
+    """
+    Create a safe file name stem from a character name.
+    
+    Args:
+        character_name (str): Character name
+        
+    Returns:
+        str: Name with only letters, digits, "_" and "-", spaces replaced by "_"
+    """
+    safe_name = "".join(x for x in character_name if x.isalnum() or x in " _-")
+    return safe_name.replace(" ", "_")
+
+def character_paths(data_dir, safe_name):
+    """
+    Get existing files holding a character in any storage format.
+    
+    Args:
+        data_dir (str): Directory with saved characters
+        safe_name (str): File name stem of the character
+        
+    Returns:
+        list: Paths of the existing files
+    """
+    paths = [os.path.join(data_dir, safe_name + extension) for extension in CHARACTER_EXTENSIONS]
+    return [path for path in paths if os.path.exists(path)]
 
 class DataManager:
     """Class for managing character data storage and retrieval."""
     
-    def __init__(self, data_dir="character_data"):
+    def __init__(self, data_dir="character_data", cache=None, storage_format=DEFAULT_STORAGE_FORMAT):
         """
         Initialize the data manager with a data directory.
         
         Args:
             data_dir (str): Directory where character data will be stored
+            cache (CharacterCache): Snapshot cache, defaults to the process-wide one
+            storage_format (str): Format for saved characters ("json", "compact",
+                "gzip", "lzma" or "packed"); reading detects the format automatically
         """
+        if storage_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unknown storage format: {storage_format}")
+        
         self.data_dir = data_dir
+        self.cache = cache if cache is not None else get_shared_cache()
+        self.storage_format = storage_format
         
         # Create data directory if it doesn't exist
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
+        
+        # Shared statistics aggregates, updated on every save and delete
+        self.aggregates = get_roster_aggregates(os.path.abspath(self.data_dir))
     
     def save_character(self, character):
         """
-        Save a character to a JSON file.
+        Save a character to a file in the configured storage format.
         
         Args:
             character (Character): Character object to save
@@ -33,19 +86,24 @@ class DataManager:
             character_dict = character.to_dict()
             
             # Create a safe filename from character name
-            safe_name = "".join(x for x in character.name if x.isalnum() or x in " _-")
-            safe_name = safe_name.replace(" ", "_")
+            safe_name = self._safe_name(character.name)
             
             # If name is empty, use a default name
             if not safe_name:
                 safe_name = f"{character.race}_{character.character_class}"
             
-            file_path = os.path.join(self.data_dir, f"{safe_name}.json")
+            file_path = os.path.join(self.data_dir, safe_name + FORMAT_EXTENSIONS[self.storage_format])
+            
+            version = self._write_file(file_path, encode_character(character_dict, self.storage_format))
+            self.cache.invalidate(file_path)
             
-            # Write to file
-            with open(file_path, 'w') as f:
-                json.dump(character_dict, f, indent=4)
+            # Drop copies of the same character stored in other formats
+            for path in self._character_paths(safe_name):
+                if path != file_path:
+                    os.remove(path)
+                    self.cache.invalidate(path)
             
+            self.aggregates.upsert(os.path.basename(file_path), version, character_dict)
             return True
         except Exception as e:
             print(f"Error saving character: {e}")
@@ -53,7 +111,10 @@ class DataManager:
     
     def load_character(self, filename):
         """
-        Load a character from a JSON file.
+        Load a character from a file in any supported storage format.
+        
+        The file is validated against the character schema once per version;
+        invalid files are moved to the quarantine directory.
         
         Args:
             filename (str): Name of the file to load
@@ -63,12 +124,21 @@ class DataManager:
         """
         try:
             file_path = os.path.join(self.data_dir, filename)
+            version = self._file_version(file_path)
             
-            with open(file_path, 'r') as f:
-                character_dict = json.load(f)
+            snapshot = self.cache.get(file_path, version)
+            if snapshot is None:
+                try:
+                    character_dict = decode_character(self._read_record(file_path),
+                                                      validate=not self.cache.is_validated(file_path, version))
+                except ValueError as e:
+                    # Covers corrupt files as well as CharacterValidationError
+                    self._quarantine(filename, getattr(e, 'errors', [f"unreadable file: {e}"]), version)
+                    return None
+                snapshot = self.cache.put(file_path, version, character_dict)
             
-            # Create a Character object from the dictionary
-            return Character(**character_dict)
+            # Create a Character object from the validated snapshot
+            return Character(**snapshot)
         except Exception as e:
             print(f"Error loading character: {e}")
             return None
@@ -77,24 +147,294 @@ class DataManager:
         """
         Get a list of all saved characters.
         
+        Characters are served from the shared snapshot cache and are only
+        re-read when a file's modification time or size changes (or the
+        snapshot was evicted). Changed files are validated together in one
+        batch, and invalid ones are moved to the quarantine directory.
+        
+        Returns:
+            list: List of read-only mappings containing character data
+        """
+        return [snapshot for filename, version, snapshot in self._list_characters()]
+    
+    def get_saved_character_files(self):
+        """
+        Get all saved characters together with the files they are stored in.
+        
+        Unlike character names, file names are unique within the data
+        directory, so they can be used to tell characters apart.
+        
+        Returns:
+            list: (file name, file version, read-only mapping of character data) triples
+        """
+        return self._list_characters()
+    
+    def get_derived(self, filename, version, name, factory):
+        """
+        Get a value computed from a saved character, cached next to its snapshot.
+        
+        Args:
+            filename (str): Name of the character file
+            version (tuple): File version from get_saved_character_files
+            name (str): Name of the derived value
+            factory (callable): Function computing the value from the character
+            
+        Returns:
+            The derived value, recomputed only when the file changes
+        """
+        return self.cache.get_derived(os.path.join(self.data_dir, filename), version, name, factory)
+    
+    def _list_characters(self):
+        """
+        Read all saved characters through the snapshot cache.
+        
         Returns:
-            list: List of dictionaries containing character data
+            list: (file name, file version, snapshot) triples of the valid characters
         """
         characters = []
         
         try:
-            # Get all JSON files in the data directory
-            for filename in os.listdir(self.data_dir):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(self.data_dir, filename)
-                    
-                    with open(file_path, 'r') as f:
-                        character_dict = json.load(f)
-                        characters.append(character_dict)
+            # Get all character files in the data directory
+            filenames = [filename for filename in os.listdir(self.data_dir) if is_character_file(filename)]
+            characters = [None] * len(filenames)
+            
+            # Serve unchanged files from the cache and collect the rest
+            pending = []
+            for position, filename in enumerate(filenames):
+                file_path = os.path.join(self.data_dir, filename)
+                try:
+                    version = self._file_version(file_path)
+                except FileNotFoundError:
+                    # Deleted since the directory was listed
+                    continue
+                snapshot = self.cache.get(file_path, version)
+                if snapshot is not None:
+                    characters[position] = (filename, version, snapshot)
+                else:
+                    pending.append((position, filename, file_path, version))
+            
+            # Parse the changed files, then validate them as one batch; evicted
+            # snapshots of already validated versions are only converted
+            records = []
+            parsed = []
+            for entry in pending:
+                position, filename, file_path, version = entry
+                try:
+                    record = self._read_record(file_path)
+                except FileNotFoundError:
+                    continue
+                except ValueError as e:
+                    self._quarantine(filename, [f"unreadable file: {e}"], version)
+                    continue
+                if self.cache.is_validated(file_path, version):
+                    character_dict = decode_character(record, validate=False)
+                    characters[position] = (filename, version, self.cache.put(file_path, version, character_dict))
+                else:
+                    records.append(record)
+                    parsed.append(entry)
+            
+            valid, invalid = decode_characters(records)
+            for index, character_dict in valid:
+                position, filename, file_path, version = parsed[index]
+                characters[position] = (filename, version, self.cache.put(file_path, version, character_dict))
+            for index, errors in invalid:
+                self._quarantine(parsed[index][1], errors, parsed[index][3])
         except Exception as e:
             print(f"Error getting saved characters: {e}")
         
-        return characters
+        return [character for character in characters if character is not None]
+    
+    def get_quarantined_files(self):
+        """
+        Get the files that failed validation and were quarantined.
+        
+        Returns:
+            dict: Mapping of file name to the list of validation errors
+        """
+        quarantined = {}
+        quarantine_dir = os.path.join(self.data_dir, QUARANTINE_DIR)
+        
+        if not os.path.isdir(quarantine_dir):
+            return quarantined
+        
+        for filename in sorted(os.listdir(quarantine_dir)):
+            if filename.endswith('.errors'):
+                with open(os.path.join(quarantine_dir, filename), 'r', encoding='utf-8') as f:
+                    quarantined[filename[:-len('.errors')]] = f.read().splitlines()
+        
+        return quarantined
+    
+    def get_roster_aggregates(self):
+        """
+        Get the roster statistics aggregates, rebuilding them if needed.
+        
+        The aggregates are kept current by save_character and delete_character.
+        Every file's modification time and size is compared against the
+        versions the aggregates were built from, so files added, removed or
+        overwritten by something else (another process, a manual edit)
+        trigger a rebuild from the snapshot cache.
+        
+        Returns:
+            RosterAggregates: Up-to-date aggregates for this data directory
+        """
+        if not self.aggregates.is_current(self._file_versions()):
+            self.aggregates.rebuild(self._list_characters())
+        return self.aggregates
+    
+    def _file_versions(self):
+        """Version stamps of all character files, keyed by file name."""
+        versions = {}
+        for filename in os.listdir(self.data_dir):
+            if is_character_file(filename):
+                try:
+                    versions[filename] = self._file_version(os.path.join(self.data_dir, filename))
+                except FileNotFoundError:
+                    continue
+        return versions
+    
+    def _write_file(self, file_path, data):
+        """
+        Write a file atomically through a temporary file in the same directory.
+        
+        Args:
+            file_path (str): Destination path
+            data (bytes): File content
+            
+        Returns:
+            tuple: Version stamp of the written content, kept by the rename
+        """
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".",
+                                         prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                os.fchmod(f.fileno(), 0o666 & ~_UMASK)
+                f.write(data)
+                f.flush()
+                stat = os.fstat(f.fileno())
+            os.replace(temp_path, file_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _file_version(self, file_path):
+        """Version stamp of a file used to detect changes."""
+        stat = os.stat(file_path)
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _read_record(self, file_path):
+        """Read a raw character record, detecting the storage format."""
+        with open(file_path, 'rb') as f:
+            return decode_character_data(f.read())
+    
+    def _safe_name(self, character_name):
+        """Create a safe file name stem from a character name."""
+        return safe_file_stem(character_name)
+    
+    def _character_paths(self, safe_name):
+        """Paths of existing files holding the character in any storage format."""
+        return character_paths(self.data_dir, safe_name)
+    
+    def character_exists(self, character_name):
+        """
+        Check whether a character with this name is already saved.
+        
+        Args:
+            character_name (str): Name of the character
+            
+        Returns:
+            bool: True if a file for the character exists in any storage format
+        """
+        safe_name = self._safe_name(character_name)
+        return bool(safe_name) and bool(self._character_paths(safe_name))
+    
+    def convert_storage(self, storage_format):
+        """
+        Rewrite all saved characters in another storage format.
+        
+        Invalid files are moved to the quarantine directory instead.
+        
+        Args:
+            storage_format (str): Target format, one of FORMAT_EXTENSIONS
+            
+        Returns:
+            tuple: (number of converted files, total bytes before, total bytes after)
+        """
+        if storage_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Unknown storage format: {storage_format}")
+        
+        converted = 0
+        bytes_before = 0
+        bytes_after = 0
+        
+        for filename in sorted(os.listdir(self.data_dir)):
+            if not is_character_file(filename):
+                continue
+            
+            file_path = os.path.join(self.data_dir, filename)
+            try:
+                version = self._file_version(file_path)
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                # Deleted since the directory was listed
+                continue
+            
+            try:
+                character_dict = decode_character(decode_character_data(data))
+            except ValueError as e:
+                # Covers corrupt files as well as CharacterValidationError
+                self._quarantine(filename, getattr(e, 'errors', [f"unreadable file: {e}"]), version)
+                continue
+            
+            encoded = encode_character(character_dict, storage_format)
+            new_path = os.path.join(self.data_dir,
+                                    strip_extension(filename) + FORMAT_EXTENSIONS[storage_format])
+            
+            self._write_file(new_path, encoded)
+            if new_path != file_path:
+                os.remove(file_path)
+            
+            self.cache.invalidate(file_path)
+            self.cache.invalidate(new_path)
+            converted += 1
+            bytes_before += len(data)
+            bytes_after += len(encoded)
+        
+        return converted, bytes_before, bytes_after
+    
+    def _quarantine(self, filename, errors, version=None):
+        """
+        Move an invalid character file aside and record why it was rejected.
+        
+        Args:
+            filename (str): Name of the file inside the data directory
+            errors (list): Validation errors to record next to the file
+            version: Version stamp the file was read at; if the file has changed
+                since (e.g. another session saved it), it is left in place
+        """
+        try:
+            if version is not None:
+                try:
+                    if self._file_version(os.path.join(self.data_dir, filename)) != version:
+                        return
+                except FileNotFoundError:
+                    return
+            
+            quarantine_dir = os.path.join(self.data_dir, QUARANTINE_DIR)
+            os.makedirs(quarantine_dir, exist_ok=True)
+            
+            file_path = os.path.join(self.data_dir, filename)
+            os.replace(file_path, os.path.join(quarantine_dir, filename))
+            self.cache.invalidate(file_path)
+            self.aggregates.remove([filename])
+            
+            with open(os.path.join(quarantine_dir, f"{filename}.errors"), 'w', encoding='utf-8') as f:
+                f.write("\n".join(errors))
+            
+            print(f"Quarantined invalid character file {filename}: {'; '.join(errors)}")
+        except OSError as e:
+            print(f"Error quarantining character file {filename}: {e}")
     
     def delete_character(self, character_name):
         """
@@ -108,14 +448,15 @@ class DataManager:
         """
         try:
             # Create a safe filename from character name
-            safe_name = "".join(x for x in character_name if x.isalnum() or x in " _-")
-            safe_name = safe_name.replace(" ", "_")
-            
-            file_path = os.path.join(self.data_dir, f"{safe_name}.json")
+            safe_name = self._safe_name(character_name)
             
             # Check if file exists before deleting
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            file_paths = self._character_paths(safe_name) if safe_name else []
+            if file_paths:
+                for file_path in file_paths:
+                    os.remove(file_path)
+                    self.cache.invalidate(file_path)
+                self.aggregates.remove([os.path.basename(file_path) for file_path in file_paths])
                 return True
             else:
                 return False
@@ -70,12 +70,19 @@ races = {
     }
 }
 
-# D&D 5e classes with their descriptions, hit die, and starting equipment
+# Minimum score in each primary ability (the multiclassing prerequisite in the 5e rules)
+PRIMARY_ABILITY_THRESHOLD = 13
+
+# Party roles a class can fill, used by the party builder
+party_roles = ["Защитник", "Урон", "Лекарь", "Поддержка", "Контроль", "Разведчик"]
+
+# D&D 5e classes with their descriptions, hit die, party roles, and starting equipment
 classes = {
     "Варвар": {
         "description": "Свирепый воин, способный входить в боевую ярость",
         "hit_die": 12,
         "primary_abilities": ["Strength", "Constitution"],
+        "roles": ["Защитник", "Урон"],
         "starting_equipment": [
             "Секира",
             "Два ручных топора",
@@ -87,6 +94,7 @@ classes = {
         "description": "Вдохновляющий волшебник, чья сила отражает музыку творения",
         "hit_die": 8,
         "primary_abilities": ["Charisma", "Dexterity"],
+        "roles": ["Поддержка", "Лекарь"],
         "starting_equipment": [
             "Рапира",
             "Набор дипломата",
@@ -99,6 +107,7 @@ classes = {
         "description": "Священный заступник, владеющий божественной магией на службе высшей силы",
         "hit_die": 8,
         "primary_abilities": ["Wisdom", "Strength"],
+        "roles": ["Лекарь", "Поддержка"],
         "starting_equipment": [
             "Булава",
             "Чешуйчатая броня",
@@ -112,6 +121,7 @@ classes = {
         "description": "Жрец Старой Веры, владеющий силами природы и принимающий формы животных",
         "hit_die": 8,
         "primary_abilities": ["Wisdom", "Constitution"],
+        "roles": ["Лекарь", "Контроль"],
         "starting_equipment": [
             "Деревянный щит",
             "Скимитар",
@@ -124,6 +134,7 @@ classes = {
         "description": "Мастер боевого искусства, владеющий разнообразным оружием и доспехами",
         "hit_die": 10,
         "primary_abilities": ["Strength", "Constitution"],
+        "roles": ["Защитник", "Урон"],
         "starting_equipment": [
             "Кольчуга",
             "Длинный меч",
@@ -136,6 +147,7 @@ classes = {
         "description": "Мастер боевых искусств, использующий силу тела в стремлении к физическому и духовному совершенству",
         "hit_die": 8,
         "primary_abilities": ["Dexterity", "Wisdom"],
+        "roles": ["Урон", "Разведчик"],
         "starting_equipment": [
             "Короткий меч",
             "Набор исследователя подземелий",
@@ -146,6 +158,7 @@ classes = {
         "description": "Святой воин, связанный священной клятвой",
         "hit_die": 10,
         "primary_abilities": ["Strength", "Charisma"],
+        "roles": ["Защитник", "Лекарь"],
         "starting_equipment": [
             "Кольчуга",
             "Длинный меч",
@@ -159,6 +172,7 @@ classes = {
         "description": "Воин, сражающийся с угрозами на границах цивилизации",
         "hit_die": 10,
         "primary_abilities": ["Dexterity", "Wisdom"],
+        "roles": ["Урон", "Разведчик"],
         "starting_equipment": [
             "Чешуйчатая броня",
             "Два коротких меча",
@@ -170,6 +184,7 @@ classes = {
         "description": "Мошенник, использующий скрытность и хитрость для преодоления препятствий и врагов",
         "hit_die": 8,
         "primary_abilities": ["Dexterity", "Intelligence"],
+        "roles": ["Урон", "Разведчик"],
         "starting_equipment": [
             "Рапира",
             "Короткий лук и 20 стрел",
@@ -183,6 +198,7 @@ classes = {
         "description": "Заклинатель, черпающий внутреннюю магию из дара или родословной",
         "hit_die": 6,
         "primary_abilities": ["Charisma", "Constitution"],
+        "roles": ["Урон", "Контроль"],
         "starting_equipment": [
             "Легкий арбалет и 20 болтов",
             "Магический фокус",
@@ -194,6 +210,7 @@ classes = {
         "description": "Владелец магии, полученной в результате сделки с внепланарной сущностью",
         "hit_die": 8,
         "primary_abilities": ["Charisma", "Constitution"],
+        "roles": ["Урон", "Контроль"],
         "starting_equipment": [
             "Легкий арбалет и 20 болтов",
             "Магический фокус",
@@ -207,6 +224,7 @@ classes = {
         "description": "Ученый маг, способный манипулировать структурами реальности",
         "hit_die": 6,
         "primary_abilities": ["Intelligence", "Constitution"],
+        "roles": ["Контроль", "Поддержка"],
         "starting_equipment": [
             "Посох",
             "Мешочек с компонентами",
@@ -0,0 +1,208 @@
+"""Concurrent-session load test for app.py built on Streamlit's AppTest.
+
+Each scenario seeds a fresh character_data/ with a roster of random
+characters and runs N simulated sessions that roll, save, list and load
+characters. Rerun latency percentiles, throughput and peak RSS are
+reported for every combination of session count and roster size.
+
+AppTest drives scripts through a process-global mock runtime, so script
+executions are serialized with a lock. Reruns of this app are GIL-bound
+Python, so this approximates a single server process; the measured
+latency includes the time a session waits for its turn.
+
+Usage:
+    python loadtest.py --sessions 1 4 16 --roster 10 100 1000 --iterations 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+def seed_roster(data_dir, roster_size, rng):
+    """
+    Fill a data directory with random valid characters.
+
+    Args:
+        data_dir (str): Directory to create the characters in
+        roster_size (int): Number of characters
+        rng (random.Random): Random generator for reproducible rosters
+    """
+    from character import Character
+    from character_schema import ABILITIES
+    from data_manager import DataManager
+    from dnd_data import races, classes, backgrounds
+
+    data_manager = DataManager(data_dir)
+    for index in range(roster_size):
+        ability_scores = {ability: rng.randint(3, 18) for ability in ABILITIES}
+        data_manager.save_character(Character(
+            name=f"Seed {index}",
+            race=rng.choice(list(races)),
+            character_class=rng.choice(list(classes)),
+            background=rng.choice(list(backgrounds)),
+            ability_scores=ability_scores
+        ))
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _find_button(at, label):
+    """Find a button by its label."""
+    return next(button for button in at.button if button.label == label)
+
+
+def run_session(session_index, iterations, run_lock, latencies, errors, seed):
+    """
+    Simulate one user session: roll, save, list and load characters.
+
+    Args:
+        session_index (int): Index of the session, used in character names
+        iterations (int): Number of roll/save/list/load cycles
+        run_lock (threading.Lock): Lock serializing AppTest script runs
+        latencies (list): Shared list receiving rerun latencies in seconds
+        errors (list): Shared list receiving exception messages
+        seed (int): Seed for the session's choices
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+
+    def rerun(action):
+        started = time.perf_counter()
+        with run_lock:
+            action()
+        latencies.append(time.perf_counter() - started)
+        if at.exception:
+            errors.append(at.exception[0].message)
+
+    try:
+        rerun(at.run)
+        for iteration in range(iterations):
+            # Create page: roll, name and save a character
+            rerun(lambda: at.sidebar.radio[0].set_value("Создать персонажа").run())
+            rerun(lambda: _find_button(at, "Бросить кости характеристик").click().run())
+            rerun(lambda: at.text_input[0].input(f"Load {session_index} {iteration}").run())
+            rerun(lambda: _find_button(at, "Сохранить персонажа").click().run())
+
+            # Load page: list the roster and load a random character
+            rerun(lambda: at.sidebar.radio[0].set_value("Загрузить персонажа").run())
+            if at.selectbox:
+                options = at.selectbox[0].options
+                rerun(lambda: at.selectbox[0].set_value(rng.choice(options)).run())
+                rerun(lambda: _find_button(at, "Загрузить выбранного персонажа").click().run())
+    except Exception as e:
+        errors.append(f"session {session_index}: {e!r}")
+
+
+def run_scenario(sessions, roster_size, iterations, seed):
+    """
+    Run one load-test scenario in the current process.
+
+    Args:
+        sessions (int): Number of concurrent sessions
+        roster_size (int): Number of characters seeded before the run
+        iterations (int): Cycles per session
+        seed (int): Base random seed
+
+    Returns:
+        dict: Scenario parameters and measured statistics
+    """
+    previous_dir = os.getcwd()
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+
+    with tempfile.TemporaryDirectory(prefix="dnd_loadtest_") as work_dir:
+        os.chdir(work_dir)
+        try:
+            seed_roster("character_data", roster_size, random.Random(seed))
+
+            # Warm up imports and bytecode so the first measured rerun is not an outlier
+            from streamlit.testing.v1 import AppTest
+            AppTest.from_file(APP_PATH, default_timeout=60).run()
+
+            run_lock = threading.Lock()
+            latencies = []
+            errors = []
+            threads = [threading.Thread(target=run_session,
+                                        args=(index, iterations, run_lock, latencies, errors, seed + index))
+                       for index in range(sessions)]
+
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            # Leave the directory before it is removed
+            os.chdir(previous_dir)
+
+    latencies.sort()
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+
+    return {
+        "sessions": sessions,
+        "roster": roster_size,
+        "reruns": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb,
+        "errors": errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test app.py with concurrent simulated sessions.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16],
+                        help="Numbers of concurrent sessions to test")
+    parser.add_argument("--roster", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Roster sizes to seed character_data/ with")
+    parser.add_argument("--iterations", type=int, default=5, help="Roll/save/list/load cycles per session")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for rosters and session choices")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    # Every scenario runs in a fresh process so peak RSS and caches are per scenario
+    context = multiprocessing.get_context("spawn")
+    results = []
+
+    print(f"{'sessions':>8} {'roster':>7} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'reruns/s':>9} {'peak RSS MB':>12}")
+    for roster_size in args.roster:
+        for sessions in args.sessions:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_scenario, (sessions, roster_size, args.iterations, args.seed))
+            results.append(result)
+
+            print(f"{result['sessions']:>8} {result['roster']:>7} {result['reruns']:>7} "
+                  f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                  f"{result['throughput']:>9.1f} {result['peak_rss_mb']:>12.1f}")
+            for error in result["errors"][:5]:
+                print(f"    error: {error}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+from collections import namedtuple
+
+from character import Character
+from character_schema import ABILITIES
+from dnd_data import classes, party_roles
+
+# Weights of the balance score components, summing to 100
+ROLE_WEIGHT = 50
+SPREAD_WEIGHT = 30
+MODIFIER_WEIGHT = 20
+
+# Average primary-ability modifier mapped to the 0..1 range of the modifier component
+MODIFIER_FLOOR = -1
+MODIFIER_CEILING = 4
+
+_ROLE_BITS = {role: 1 << index for index, role in enumerate(party_roles)}
+_ABILITY_BITS = {ability: 1 << index for index, ability in enumerate(ABILITIES)}
+_ALL_ROLES = (1 << len(party_roles)) - 1
+
+# Precomputed per-character vector used by scoring and search
+PartyMember = namedtuple("PartyMember", ["name", "character_class", "role_mask", "ability_mask",
+                                         "modifier_total", "primary_count"])
+
+
+def _mask(bits, names):
+    """Combine named bits into one integer mask."""
+    mask = 0
+    for name in names:
+        mask |= bits[name]
+    return mask
+
+
+def _popcount(mask):
+    """Number of set bits in a mask."""
+    return bin(mask).count("1")
+
+
+def make_member(character_dict):
+    """
+    Precompute the party vector of a saved character.
+
+    Args:
+        character_dict (dict): Character data, e.g. a roster snapshot
+
+    Returns:
+        PartyMember: Role and primary-ability masks, the total primary modifier
+            and the number of primary abilities it sums over
+    """
+    character = Character(**character_dict)
+    class_data = classes[character.character_class]
+    modifier_total = sum(character.get_ability_modifier(ability) for ability in class_data['primary_abilities'])
+    return PartyMember(
+        name=character.name,
+        character_class=character.character_class,
+        role_mask=_mask(_ROLE_BITS, class_data['roles']),
+        ability_mask=_mask(_ABILITY_BITS, class_data['primary_abilities']),
+        modifier_total=modifier_total,
+        primary_count=len(class_data['primary_abilities'])
+    )
+
+
+def _score(role_mask, ability_mask, modifier_total, primary_count):
+    """Balance score from combined masks, total modifier and primary-ability count of a party."""
+    if not primary_count:
+        return 0.0
+    return _balance(role_mask, ability_mask, modifier_total / primary_count)
+
+
+def _balance(role_mask, ability_mask, average_modifier):
+    """Balance score from combined masks and the average primary modifier of a party."""
+    role_coverage = _popcount(role_mask) / len(party_roles)
+    ability_spread = _popcount(ability_mask) / len(ABILITIES)
+    modifier_component = min(1.0, max(0.0, (average_modifier - MODIFIER_FLOOR) / (MODIFIER_CEILING - MODIFIER_FLOOR)))
+    return ROLE_WEIGHT * role_coverage + SPREAD_WEIGHT * ability_spread + MODIFIER_WEIGHT * modifier_component
+
+
+def score_party(members):
+    """
+    Score the composition balance of a party.
+
+    The score (0-100) combines the share of party roles covered, the share
+    of the six abilities that are primary for some member, and the average
+    modifier over all primary abilities of the members.
+
+    Args:
+        members (list): PartyMember vectors of the party
+
+    Returns:
+        dict: Total score and its components
+    """
+    role_mask = 0
+    ability_mask = 0
+    modifier_total = 0
+    primary_count = 0
+    for member in members:
+        role_mask |= member.role_mask
+        ability_mask |= member.ability_mask
+        modifier_total += member.modifier_total
+        primary_count += member.primary_count
+
+    return {
+        "score": _score(role_mask, ability_mask, modifier_total, primary_count),
+        "covered_roles": [role for role in party_roles if role_mask & _ROLE_BITS[role]],
+        "missing_roles": [role for role in party_roles if not role_mask & _ROLE_BITS[role]],
+        "primary_abilities": [ability for ability in ABILITIES if ability_mask & _ABILITY_BITS[ability]],
+        "modifier_total": modifier_total
+    }
+
+
+def suggest_party(members, size):
+    """
+    Find the best-scoring party of a given size from a pool.
+
+    Roles and primary abilities depend only on the class, so for any chosen
+    mix of classes the best party takes the members with the highest
+    modifiers of each class. The search therefore keeps only the top `size`
+    members per class and enumerates class mixes with branch and bound,
+    which stays fast on pools of thousands of characters. The result
+    scores the same as an exhaustive search over all combinations, see
+    test_party_builder.py.
+
+    Args:
+        members (list): PartyMember vectors of the candidate pool
+        size (int): Number of party members
+
+    Returns:
+        list: Members of the best party (empty if the pool is too small)
+    """
+    if size <= 0 or len(members) < size:
+        return []
+
+    # Best candidates per class, strongest first, with prefix sums of modifiers.
+    # Members of a class share their primary abilities, so for a fixed number
+    # taken from a class the strongest ones also give the best average.
+    by_class = {}
+    for member in members:
+        by_class.setdefault(member.character_class, []).append(member)
+    groups = []
+    for class_members in by_class.values():
+        class_members.sort(key=lambda member: member.modifier_total, reverse=True)
+        class_members = class_members[:size]
+        prefix = [0]
+        for member in class_members:
+            prefix.append(prefix[-1] + member.modifier_total)
+        groups.append((class_members[0].role_mask, class_members[0].ability_mask,
+                       class_members[0].primary_count, class_members, prefix))
+    groups.sort(key=lambda group: group[4][1] / group[2], reverse=True)
+
+    # Optimistic bounds for the groups not yet decided. Adding members can
+    # raise the party's average primary modifier at most to the best
+    # per-ability average of a remaining member.
+    remaining_roles = [0] * (len(groups) + 1)
+    remaining_abilities = [0] * (len(groups) + 1)
+    remaining_best = [None] * (len(groups) + 1)
+    for index in range(len(groups) - 1, -1, -1):
+        remaining_roles[index] = remaining_roles[index + 1] | groups[index][0]
+        remaining_abilities[index] = remaining_abilities[index + 1] | groups[index][1]
+        best = groups[index][4][1] / groups[index][2]
+        remaining_best[index] = best if remaining_best[index + 1] is None else max(best, remaining_best[index + 1])
+
+    best_score = -1.0
+    best_counts = None
+    counts = [0] * len(groups)
+
+    def search(index, slots, role_mask, ability_mask, modifier_total, primary_count):
+        nonlocal best_score, best_counts
+        if slots == 0:
+            score = _score(role_mask, ability_mask, modifier_total, primary_count)
+            if score > best_score:
+                best_score = score
+                best_counts = list(counts)
+            return
+        if index == len(groups):
+            return
+
+        best_average = remaining_best[index]
+        if primary_count:
+            best_average = max(best_average, modifier_total / primary_count)
+        bound = _balance(role_mask | remaining_roles[index], ability_mask | remaining_abilities[index], best_average)
+        if bound <= best_score:
+            return
+
+        group_roles, group_abilities, group_primary_count, class_members, prefix = groups[index]
+        for taken in range(min(slots, len(class_members)), -1, -1):
+            counts[index] = taken
+            if taken:
+                search(index + 1, slots - taken, role_mask | group_roles, ability_mask | group_abilities,
+                       modifier_total + prefix[taken], primary_count + taken * group_primary_count)
+            else:
+                search(index + 1, slots, role_mask, ability_mask, modifier_total, primary_count)
+        counts[index] = 0
+
+    search(0, size, 0, 0, 0, 0)
+
+    party = []
+    for group, taken in zip(groups, best_counts or []):
+        party.extend(group[3][:taken])
+    return party
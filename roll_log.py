@@ -0,0 +1,269 @@
+"""Seeded dice rolling with an append-only binary roll log.
+
+Every session rolls with its own random.Random and a random session id,
+and every roll is appended to the log as a fixed-width record carrying
+the session's seed. A session can be replayed from its records to prove
+that the logged dice are exactly what the seeded generator produced.
+
+Usage:
+    python roll_log.py --session 1234567890
+    python roll_log.py --character "Имя персонажа" --verify
+"""
+import argparse
+import hashlib
+import itertools
+import os
+import random
+import secrets
+import struct
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from character_schema import ABILITIES
+
+# Name of the roll log inside the data directory
+ROLL_LOG_FILE = "rolls.bin"
+
+# Roll methods and the number of dice each one throws
+METHOD_4D6_DROP_LOWEST = 1
+METHOD_DICE = {METHOD_4D6_DROP_LOWEST: 4}
+MAX_DICE = 8
+
+# Fixed-width record: timestamp (ns), session id, session seed, character key,
+# sequence number within the session, method, ability index, dice count,
+# padding, dice
+RECORD = struct.Struct("<QQQQIBBBx8B")
+RECORD_DTYPE = np.dtype([
+    ("timestamp_ns", "<u8"),
+    ("session", "<u8"),
+    ("seed", "<u8"),
+    ("character", "<u8"),
+    ("sequence", "<u4"),
+    ("method", "u1"),
+    ("ability", "u1"),
+    ("dice_count", "u1"),
+    ("padding", "u1"),
+    ("dice", "u1", (MAX_DICE,))
+])
+
+
+def character_key(character_name):
+    """
+    Map a character name to the 64-bit key stored in the log.
+
+    Args:
+        character_name (str): Character name (0 is used for an empty name)
+
+    Returns:
+        int: Stable 64-bit key
+    """
+    if not character_name:
+        return 0
+    digest = hashlib.blake2b(character_name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+# Number of sessions seeded from ROLL_SEED in this process
+_seed_counter = itertools.count()
+
+
+def new_session_id():
+    """
+    Create a random session id.
+
+    Returns:
+        int: 64-bit session id
+    """
+    return secrets.randbits(64)
+
+
+def new_session_seed():
+    """
+    Create the seed of a session's dice.
+
+    When the ROLL_SEED environment variable is set, the n-th session of the
+    process gets a seed derived from ROLL_SEED and n, so fixtures are
+    reproducible while every session still rolls differently.
+
+    Returns:
+        int: 64-bit seed
+    """
+    if os.environ.get("ROLL_SEED"):
+        material = f"{os.environ['ROLL_SEED']}:{next(_seed_counter)}".encode("utf-8")
+        return int.from_bytes(hashlib.blake2b(material, digest_size=8).digest(), "little")
+    return secrets.randbits(64)
+
+
+class RollLog:
+    """Append-only file of fixed-width roll records."""
+
+    def __init__(self, path):
+        """
+        Initialize the log.
+
+        Args:
+            path (str): Path of the log file; created on first append
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, records):
+        """
+        Append roll records in a single write.
+
+        Args:
+            records (list): Tuples of (timestamp_ns, session, seed, character, sequence,
+                method, ability, dice) where dice is a sequence of die values
+        """
+        data = b"".join(
+            RECORD.pack(timestamp_ns, session, seed, character, sequence, method, ability, len(dice),
+                        *(list(dice) + [0] * (MAX_DICE - len(dice))))
+            for timestamp_ns, session, seed, character, sequence, method, ability, dice in records
+        )
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+
+    def read(self):
+        """
+        Map the whole log as a NumPy structured array without copying it.
+
+        Returns:
+            numpy.ndarray: Records with RECORD_DTYPE fields
+        """
+        if not os.path.exists(self.path):
+            return np.empty(0, dtype=RECORD_DTYPE)
+
+        # Ignore a partially written trailing record
+        count = os.path.getsize(self.path) // RECORD.size
+        if not count:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+    def query(self, session=None, character_name=None):
+        """
+        Select records of a session and/or character.
+
+        Args:
+            session (int): Session id to match
+            character_name (str): Character name to match
+
+        Returns:
+            numpy.ndarray: Matching records in log order
+        """
+        records = self.read()
+        mask = np.ones(len(records), dtype=bool)
+        if session is not None:
+            mask &= records["session"] == np.uint64(session)
+        if character_name is not None:
+            mask &= records["character"] == np.uint64(character_key(character_name))
+        return np.array(records[mask])
+
+
+class DiceRoller:
+    """Per-session seeded dice roller that logs every roll."""
+
+    def __init__(self, log=None, session=None, seed=None):
+        """
+        Initialize the roller.
+
+        Args:
+            log (RollLog): Log to append rolls to, or None to not log
+            session (int): Session id; a new one is created if omitted
+            seed (int): Seed of the dice; a new one is created if omitted
+        """
+        self.log = log
+        self.session = new_session_id() if session is None else session
+        self.seed = new_session_seed() if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.sequence = 0
+
+    def roll_ability_scores(self, character_name=""):
+        """
+        Roll six ability scores by 4d6, dropping the lowest die.
+
+        Args:
+            character_name (str): Name the rolls are logged under
+
+        Returns:
+            dict: Ability scores keyed by ability name
+        """
+        ability_scores = {}
+        records = []
+        timestamp_ns = time.time_ns()
+        key = character_key(character_name)
+
+        for index, ability in enumerate(ABILITIES):
+            # Roll 4d6, remove lowest die
+            rolls = [self.rng.randint(1, 6) for _ in range(METHOD_DICE[METHOD_4D6_DROP_LOWEST])]
+            ability_scores[ability] = sum(sorted(rolls, reverse=True)[:3])
+            records.append((timestamp_ns, self.session, self.seed, key, self.sequence, METHOD_4D6_DROP_LOWEST, index, rolls))
+            self.sequence += 1
+
+        if self.log is not None:
+            self.log.append(records)
+        return ability_scores
+
+
+def replay_session(records):
+    """
+    Check logged rolls of one session against its seeded generator.
+
+    Args:
+        records (numpy.ndarray): Records of a single session, e.g. from RollLog.query
+
+    Returns:
+        int: Number of records whose dice differ from the replay
+    """
+    if not len(records):
+        return 0
+
+    records = np.sort(records, order="sequence")
+    rng = random.Random(int(records["seed"][0]))
+    mismatches = 0
+    next_sequence = 0
+
+    for record in records:
+        # Regenerate dice of unlogged rolls too so the generator stays in step
+        while next_sequence <= record["sequence"]:
+            method = int(record["method"]) if next_sequence == record["sequence"] else METHOD_4D6_DROP_LOWEST
+            expected = [rng.randint(1, 6) for _ in range(METHOD_DICE.get(method, 0))]
+            next_sequence += 1
+        if expected != record["dice"][:record["dice_count"]].tolist():
+            mismatches += 1
+
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and verify the dice roll log.")
+    parser.add_argument("--log", default=os.path.join("character_data", ROLL_LOG_FILE), help="Roll log file")
+    parser.add_argument("--session", type=int, help="Show rolls of this session id")
+    parser.add_argument("--character", help="Show rolls made for this character name")
+    parser.add_argument("--verify", action="store_true", help="Replay each session and check the logged dice")
+    args = parser.parse_args()
+
+    records = RollLog(args.log).query(session=args.session, character_name=args.character)
+    for record in records:
+        timestamp = datetime.fromtimestamp(int(record["timestamp_ns"]) / 1e9).isoformat(sep=" ", timespec="seconds")
+        dice = record["dice"][:record["dice_count"]].tolist()
+        print(f"{timestamp}  session {record['session']} (seed {record['seed']})  #{record['sequence']}  "
+              f"{ABILITIES[record['ability']]}: {dice}")
+    print(f"{len(records)} rolls")
+
+    if args.verify:
+        for session in np.unique(records["session"]):
+            session_records = records[records["session"] == session]
+            mismatches = replay_session(session_records)
+            status = "OK" if not mismatches else f"{mismatches} mismatching rolls"
+            print(f"session {session} (seed {session_records['seed'][0]}): {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import threading
+
+import numpy as np
+
+from character_codec import CHARACTER_EXTENSIONS, strip_extension
+from character_schema import ABILITIES
+from dnd_data import races, classes, PRIMARY_ABILITY_THRESHOLD
+
+RACE_NAMES = list(races)
+CLASS_NAMES = list(classes)
+MAX_SCORE = 30
+
+_RACE_INDEX = {race: index for index, race in enumerate(RACE_NAMES)}
+_CLASS_INDEX = {name: index for index, name in enumerate(CLASS_NAMES)}
+
+# Racial bonus per race (rows) and ability (columns)
+_RACIAL_BONUSES = np.array([[races[race]['ability_bonuses'].get(ability, 0) for ability in ABILITIES]
+                            for race in RACE_NAMES], dtype=np.int16)
+
+# Boolean mask of primary abilities per class (rows) and ability (columns)
+_PRIMARY_MASKS = np.array([[ability in classes[name]['primary_abilities'] for ability in ABILITIES]
+                           for name in CLASS_NAMES], dtype=bool)
+
+
+class RosterAggregates:
+    """
+    Columnar aggregates over the saved roster, maintained incrementally.
+
+    Each character file is one row of the race, class and total-score
+    columns, keyed by its file name. The counters used by the statistics
+    page (distributions, histograms, modifier sums, primary-ability
+    thresholds) are adjusted per saved or deleted character instead of
+    being recomputed from the files.
+    """
+
+    def __init__(self, capacity=64):
+        """
+        Initialize empty aggregates.
+
+        Args:
+            capacity (int): Initial number of rows to allocate
+        """
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._keys = []
+        # (mtime_ns, size) stamp of every file the rows were built from, or None if not built
+        self.file_versions = None
+
+        self.race_codes = np.zeros(capacity, dtype=np.int16)
+        self.class_codes = np.zeros(capacity, dtype=np.int16)
+        self.total_scores = np.zeros((capacity, len(ABILITIES)), dtype=np.int16)
+
+        self.race_counts = np.zeros(len(RACE_NAMES), dtype=np.int64)
+        self.class_counts = np.zeros(len(CLASS_NAMES), dtype=np.int64)
+        self.score_histograms = np.zeros((len(ABILITIES), MAX_SCORE + 1), dtype=np.int64)
+        self.class_modifier_sums = np.zeros((len(CLASS_NAMES), len(ABILITIES)), dtype=np.int64)
+        self.class_primary_met = np.zeros(len(CLASS_NAMES), dtype=np.int64)
+
+    @property
+    def size(self):
+        """Number of characters in the aggregates."""
+        return len(self._keys)
+
+    def is_current(self, file_versions):
+        """
+        Check whether the aggregates match the files currently on disk.
+
+        Args:
+            file_versions (dict): (mtime_ns, size) stamp per character file name
+
+        Returns:
+            bool: True if every file was counted at exactly its current version
+        """
+        with self._lock:
+            return self.file_versions is not None and self.file_versions == file_versions
+
+    def rebuild(self, entries):
+        """
+        Rebuild all aggregates from scratch.
+
+        Args:
+            entries (iterable): (file name, file version, character dict) triples
+        """
+        with self._lock:
+            self._rows.clear()
+            self._keys = []
+            self.race_counts[:] = 0
+            self.class_counts[:] = 0
+            self.score_histograms[:] = 0
+            self.class_modifier_sums[:] = 0
+            self.class_primary_met[:] = 0
+
+            file_versions = {}
+            for filename, version, character_dict in entries:
+                self._upsert(filename, character_dict)
+                file_versions[filename] = version
+            self.file_versions = file_versions
+
+    def upsert(self, filename, version, character_dict):
+        """
+        Add or replace one character after it was saved.
+
+        Rows of the same character stored under another extension are
+        dropped, since saving removes those files. If another process
+        overwrote the file in the meantime, the recorded version no longer
+        matches the disk and the aggregates are rebuilt on the next read.
+
+        Args:
+            filename (str): Name of the saved file
+            version (tuple): (mtime_ns, size) of the content that was written
+            character_dict (dict): Saved character data
+        """
+        with self._lock:
+            if self.file_versions is None:
+                return
+            self._remove_stem(strip_extension(filename))
+            self._upsert(filename, character_dict)
+            self.file_versions[filename] = version
+
+    def remove(self, filenames):
+        """
+        Remove characters after their files were deleted or quarantined.
+
+        Args:
+            filenames (list): Names of the removed files
+        """
+        with self._lock:
+            if self.file_versions is None:
+                return
+            for filename in filenames:
+                self._remove(filename)
+                self.file_versions.pop(filename, None)
+
+    def summary(self):
+        """
+        Get the statistics shown on the statistics page.
+
+        Returns:
+            dict: Counts per race and class, score histograms per ability,
+                average modifiers per class and primary-ability threshold shares
+        """
+        with self._lock:
+            class_counts = self.class_counts.copy()
+            safe_counts = np.maximum(class_counts, 1)
+            return {
+                "total": self.size,
+                "race_counts": dict(zip(RACE_NAMES, self.race_counts.tolist())),
+                "class_counts": dict(zip(CLASS_NAMES, class_counts.tolist())),
+                "score_histograms": {ability: self.score_histograms[index].copy()
+                                     for index, ability in enumerate(ABILITIES)},
+                "average_modifiers": {name: dict(zip(ABILITIES, (self.class_modifier_sums[index] / safe_counts[index]).tolist()))
+                                      for index, name in enumerate(CLASS_NAMES) if class_counts[index]},
+                "primary_met_share": {name: self.class_primary_met[index] / class_counts[index]
+                                      for index, name in enumerate(CLASS_NAMES) if class_counts[index]},
+                "primary_met_total": int(self.class_primary_met.sum()) / self.size if self.size else 0.0
+            }
+
+    def _contribution(self, class_code, totals):
+        """Modifiers and primary-threshold flag of one row."""
+        modifiers = (totals.astype(np.int64) - 10) // 2
+        primary = _PRIMARY_MASKS[class_code]
+        meets = bool(np.all(totals[primary] >= PRIMARY_ABILITY_THRESHOLD))
+        return modifiers, meets
+
+    def _apply(self, row, sign):
+        """Add (sign=1) or subtract (sign=-1) a row's contribution to the counters."""
+        race_code = self.race_codes[row]
+        class_code = self.class_codes[row]
+        totals = self.total_scores[row]
+        modifiers, meets = self._contribution(class_code, totals)
+
+        self.race_counts[race_code] += sign
+        self.class_counts[class_code] += sign
+        self.score_histograms[np.arange(len(ABILITIES)), np.clip(totals, 0, MAX_SCORE)] += sign
+        self.class_modifier_sums[class_code] += sign * modifiers
+        self.class_primary_met[class_code] += sign * meets
+
+    def _upsert(self, key, character_dict):
+        """Insert or replace a row without locking."""
+        race_code = _RACE_INDEX.get(character_dict.get("race"))
+        class_code = _CLASS_INDEX.get(character_dict.get("character_class"))
+        if race_code is None or class_code is None:
+            self._remove(key)
+            return
+
+        base_scores = character_dict.get("ability_scores") or {}
+        totals = np.array([base_scores.get(ability, 0) for ability in ABILITIES], dtype=np.int16)
+        totals += _RACIAL_BONUSES[race_code]
+
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            self._ensure_capacity(row + 1)
+            self._rows[key] = row
+            self._keys.append(key)
+        else:
+            self._apply(row, -1)
+
+        self.race_codes[row] = race_code
+        self.class_codes[row] = class_code
+        self.total_scores[row] = totals
+        self._apply(row, 1)
+
+    def _remove_stem(self, stem):
+        """Remove the rows of every file with the given stem without locking."""
+        for extension in CHARACTER_EXTENSIONS:
+            filename = stem + extension
+            self._remove(filename)
+            self.file_versions.pop(filename, None)
+
+    def _remove(self, key):
+        """Remove a row without locking by moving the last row into its place."""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+
+        self._apply(row, -1)
+        last = len(self._keys) - 1
+        if row != last:
+            last_key = self._keys[last]
+            self.race_codes[row] = self.race_codes[last]
+            self.class_codes[row] = self.class_codes[last]
+            self.total_scores[row] = self.total_scores[last]
+            self._keys[row] = last_key
+            self._rows[last_key] = row
+        self._keys.pop()
+
+    def _ensure_capacity(self, rows):
+        """Grow the column arrays geometrically to hold at least the given rows."""
+        capacity = max(len(self.race_codes), 1)
+        if rows <= len(self.race_codes):
+            return
+        while capacity < rows:
+            capacity *= 2
+        self.race_codes = np.resize(self.race_codes, capacity)
+        self.class_codes = np.resize(self.class_codes, capacity)
+        self.total_scores = np.resize(self.total_scores, (capacity, len(ABILITIES)))
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_roster_aggregates(data_dir):
+    """
+    Get the process-wide aggregates for a data directory.
+
+    Args:
+        data_dir (str): Absolute path of the data directory
+
+    Returns:
+        RosterAggregates: Shared aggregates, possibly not built yet
+    """
+    with _registry_lock:
+        if data_dir not in _registry:
+            _registry[data_dir] = RosterAggregates()
+        return _registry[data_dir]
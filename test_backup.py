@@ -0,0 +1,147 @@
+"""Backup, deduplication and restore checks against temporary directories.
+
+Usage:
+    python -m unittest test_backup
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import backup
+from backup import BackupStore
+from character_codec import decode_character_data, encode_character
+from character_schema import ABILITIES
+from dnd_data import races, classes, backgrounds
+
+
+def make_character(name, strength=10):
+    """Valid character data with a given name and strength."""
+    return {
+        "name": name,
+        "race": list(races)[0],
+        "character_class": list(classes)[0],
+        "background": list(backgrounds)[0],
+        "ability_scores": {ability: strength if ability == "Strength" else 10 for ability in ABILITIES},
+        "level": 1
+    }
+
+
+class BackupTest(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.data_dir = os.path.join(temp_dir.name, "character_data")
+        self.store = BackupStore(os.path.join(temp_dir.name, "backups"))
+        os.makedirs(self.data_dir)
+
+    def write(self, filename, character_dict, storage_format="json", data_dir=None):
+        path = os.path.join(data_dir or self.data_dir, filename)
+        with open(path, 'wb') as f:
+            f.write(encode_character(character_dict, storage_format))
+        return path
+
+    def read(self, filename):
+        with open(os.path.join(self.data_dir, filename), 'rb') as f:
+            return decode_character_data(f.read())
+
+    def characters(self):
+        return sorted(os.listdir(self.data_dir))
+
+    def test_unchanged_files_are_not_copied_again(self):
+        self.write("Арвен.json", make_character("Арвен"))
+        self.write("Борин.json", make_character("Борин"))
+        first = self.store.backup(self.data_dir)
+        self.assertEqual((first["files"], first["copied"]), (2, 2))
+
+        self.write("Борин.json", make_character("Борин", strength=16))
+        second = self.store.backup(self.data_dir)
+        self.assertEqual((second["files"], second["copied"]), (2, 1))
+
+        # Identical content under another name is stored once
+        self.write("Копия.json", make_character("Борин", strength=16))
+        third = self.store.backup(self.data_dir)
+        self.assertEqual((third["files"], third["copied"]), (3, 0))
+
+    def test_restore_earlier_snapshot(self):
+        self.write("Арвен.json", make_character("Арвен", strength=8))
+        first = self.store.backup(self.data_dir)
+        self.write("Арвен.json", make_character("Арвен", strength=18))
+        self.store.backup(self.data_dir)
+
+        self.store.restore(first["id"], self.data_dir)
+        self.assertEqual(self.read("Арвен.json")["ability_scores"]["Strength"], 8)
+
+    def test_full_restore_keeps_newer_characters_unless_exact(self):
+        self.write("Арвен.json", make_character("Арвен"))
+        snapshot = self.store.backup(self.data_dir)
+        self.write("Новый.json", make_character("Новый"))
+
+        self.store.restore(snapshot["id"], self.data_dir)
+        self.assertEqual(self.characters(), ["Арвен.json", "Новый.json"])
+
+        self.store.restore(snapshot["id"], self.data_dir, exact=True)
+        self.assertEqual(self.characters(), ["Арвен.json"])
+
+    def test_single_character_restore(self):
+        self.write("Арвен.json", make_character("Арвен", strength=8))
+        self.write("Борин.json", make_character("Борин", strength=8))
+        snapshot = self.store.backup(self.data_dir)
+        self.write("Арвен.json", make_character("Арвен", strength=18))
+        self.write("Борин.json", make_character("Борин", strength=18))
+
+        self.assertEqual(self.store.restore(snapshot["id"], self.data_dir, character_name="Арвен"), ["Арвен.json"])
+        self.assertEqual(self.read("Арвен.json")["ability_scores"]["Strength"], 8)
+        self.assertEqual(self.read("Борин.json")["ability_scores"]["Strength"], 18)
+
+        with self.assertRaises(KeyError):
+            self.store.restore(snapshot["id"], self.data_dir, character_name="Гость")
+
+    def test_restore_replaces_other_format_copies(self):
+        self.write("Арвен.json", make_character("Арвен", strength=8))
+        self.store.backup(self.data_dir)
+        os.remove(os.path.join(self.data_dir, "Арвен.json"))
+        self.write("Арвен.dndc", make_character("Арвен", strength=18), storage_format="packed")
+
+        self.store.restore("latest", self.data_dir, character_name="Арвен")
+        self.assertEqual(self.characters(), ["Арвен.json"])
+        self.assertEqual(self.read("Арвен.json")["ability_scores"]["Strength"], 8)
+
+    def test_other_data_dir_is_not_trusted(self):
+        other_dir = os.path.join(os.path.dirname(self.data_dir), "other_data")
+        os.makedirs(other_dir)
+        first = self.write("Арвен.json", make_character("Арвен", strength=8))
+        self.store.backup(self.data_dir)
+
+        # Same name, size and mtime, but different content in another directory
+        second = self.write("Арвен.json", make_character("Арвен", strength=9), data_dir=other_dir)
+        stat = os.stat(first)
+        os.utime(second, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(self.store.backup(other_dir)["copied"], 1)
+
+    def test_file_deleted_during_backup_is_skipped(self):
+        self.write("Арвен.json", make_character("Арвен"))
+        self.write("Борин.json", make_character("Борин"))
+        real_stat = os.stat
+
+        def racing_stat(path, *args, **kwargs):
+            if path.endswith("Борин.json"):
+                raise FileNotFoundError(path)
+            return real_stat(path, *args, **kwargs)
+
+        with mock.patch("backup.os.stat", racing_stat):
+            result = self.store.backup(self.data_dir)
+        self.assertEqual(result["files"], 1)
+
+    def test_store_option_after_command(self):
+        self.write("Арвен.json", make_character("Арвен"))
+        argv = ["backup.py", "backup", "--store", self.store.store_dir, "--data-dir", self.data_dir]
+        with mock.patch.object(sys, "argv", argv), mock.patch("builtins.print"):
+            backup.main()
+        self.assertEqual(len(self.store.list_snapshots()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
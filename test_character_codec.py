@@ -0,0 +1,93 @@
+"""Round-trip and corruption checks of the character storage formats.
+
+Usage:
+    python -m unittest test_character_codec
+"""
+import unittest
+
+from character_codec import (FORMAT_EXTENSIONS, decode_character_data, detect_format, encode_character,
+                             is_character_file, strip_extension)
+from character_schema import ABILITIES, decode_character
+from dnd_data import races, classes, backgrounds
+
+CHARACTER = {
+    "name": "Арвен Звездочёт",
+    "race": list(races)[1],
+    "character_class": list(classes)[2],
+    "background": list(backgrounds)[3],
+    "ability_scores": dict(zip(ABILITIES, [8, 14, 13, 18, 11, 3])),
+    "level": 7
+}
+
+
+class CodecRoundTripTest(unittest.TestCase):
+
+    def test_round_trip_every_format(self):
+        for storage_format in FORMAT_EXTENSIONS:
+            with self.subTest(storage_format=storage_format):
+                data = encode_character(CHARACTER, storage_format)
+                self.assertEqual(decode_character_data(data), CHARACTER)
+                self.assertEqual(decode_character(decode_character_data(data)), CHARACTER)
+
+    def test_detect_format(self):
+        expected = {"json": "json", "compact": "json", "gzip": "gzip", "lzma": "lzma", "packed": "packed"}
+        for storage_format, detected in expected.items():
+            with self.subTest(storage_format=storage_format):
+                self.assertEqual(detect_format(encode_character(CHARACTER, storage_format)), detected)
+
+    def test_encoding_is_deterministic(self):
+        for storage_format in FORMAT_EXTENSIONS:
+            with self.subTest(storage_format=storage_format):
+                self.assertEqual(encode_character(CHARACTER, storage_format),
+                                 encode_character(dict(CHARACTER), storage_format))
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            encode_character(CHARACTER, "xml")
+
+    def test_extensions(self):
+        for storage_format, extension in FORMAT_EXTENSIONS.items():
+            with self.subTest(storage_format=storage_format):
+                filename = "Арвен" + extension
+                self.assertTrue(is_character_file(filename))
+                self.assertEqual(strip_extension(filename), "Арвен")
+        self.assertFalse(is_character_file(".Арвен.json.abc123.tmp"))
+
+
+class CodecCorruptionTest(unittest.TestCase):
+
+    def test_truncated_data_raises_value_error(self):
+        for storage_format in FORMAT_EXTENSIONS:
+            data = encode_character(CHARACTER, storage_format)
+            for length in (len(data) // 2, len(data) - 1):
+                with self.subTest(storage_format=storage_format, length=length):
+                    with self.assertRaises(ValueError):
+                        decode_character_data(data[:length])
+
+    def test_garbage_raises_value_error(self):
+        for data in (b"", b"\xff\xfe\x00garbage", b"\x1f\x8bnot gzip", b"\xfd7zXZ\x00not xz", b"DNDC"):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    decode_character_data(data)
+
+    def test_packed_length_mismatch(self):
+        data = encode_character(dict(CHARACTER, background="Sage"), "packed")
+        for corrupt in (data[:-1], data + b"\x00"):
+            with self.subTest(length=len(corrupt)):
+                with self.assertRaises(ValueError):
+                    decode_character_data(corrupt)
+
+    def test_unsupported_packed_version(self):
+        data = bytearray(encode_character(CHARACTER, "packed"))
+        data[4] = 99
+        with self.assertRaises(ValueError):
+            decode_character_data(bytes(data))
+
+    def test_unpackable_character(self):
+        character = dict(CHARACTER, ability_scores={"Strength": 10})
+        with self.assertRaises(ValueError):
+            encode_character(character, "packed")
+
+
+if __name__ == "__main__":
+    unittest.main()
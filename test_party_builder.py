@@ -0,0 +1,59 @@
+"""Checks of the party builder against an exhaustive search.
+
+Usage:
+    python -m unittest test_party_builder
+"""
+import itertools
+import random
+import unittest
+
+from character_schema import ABILITIES
+from dnd_data import races, classes, backgrounds
+from party_builder import MODIFIER_WEIGHT, PartyMember, make_member, score_party, suggest_party
+
+
+def random_pool(rng, size):
+    """Random party members with unique names."""
+    return [make_member({
+        "name": f"Member {index}",
+        "race": rng.choice(list(races)),
+        "character_class": rng.choice(list(classes)),
+        "background": rng.choice(list(backgrounds)),
+        "ability_scores": {ability: rng.randint(3, 18) for ability in ABILITIES}
+    }) for index in range(size)]
+
+
+def brute_force_score(pool, size):
+    """Best balance score over every combination of the pool."""
+    return max(score_party(party)["score"] for party in itertools.combinations(pool, size))
+
+
+class SuggestPartyTest(unittest.TestCase):
+
+    def test_matches_exhaustive_search(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            pool = random_pool(rng, rng.randint(4, 12))
+            if rng.random() < 0.5:
+                # Classes with differing numbers of primary abilities
+                counts = {name: rng.randint(1, 3) for name in classes}
+                pool = [member._replace(primary_count=counts[member.character_class]) for member in pool]
+            size = rng.randint(1, min(6, len(pool)))
+            party = suggest_party(pool, size)
+            self.assertEqual(len(party), size)
+            self.assertEqual(len(set(party)), size)
+            self.assertAlmostEqual(score_party(party)["score"], brute_force_score(pool, size))
+
+    def test_pool_too_small(self):
+        pool = random_pool(random.Random(1), 3)
+        self.assertEqual(suggest_party(pool, 4), [])
+
+    def test_average_uses_primary_ability_count(self):
+        # Three primary abilities with modifiers summing to 6 average +2, i.e. 60% of the modifier weight
+        member = PartyMember(name="Solo", character_class="", role_mask=0, ability_mask=0,
+                             modifier_total=6, primary_count=3)
+        self.assertAlmostEqual(score_party([member])["score"], 0.6 * MODIFIER_WEIGHT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Checks of the roll log format and session replay.
+
+Usage:
+    python -m unittest test_roll_log
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from roll_log import RECORD, RECORD_DTYPE, DiceRoller, RollLog, new_session_seed, replay_session
+
+
+class RollLogTest(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, "rolls.bin")
+        self.log = RollLog(self.path)
+
+    def test_record_layout_matches_dtype(self):
+        self.assertEqual(RECORD.size, RECORD_DTYPE.itemsize)
+
+    def test_replay_matches_logged_rolls(self):
+        roller = DiceRoller(self.log)
+        scores = [roller.roll_ability_scores("Арвен") for _ in range(3)]
+        records = self.log.query(session=roller.session)
+        self.assertEqual(len(records), 18)
+        self.assertEqual(replay_session(records), 0)
+
+        # Logged dice give the returned scores: 4d6 dropping the lowest
+        totals = [sum(sorted(record["dice"][:record["dice_count"]].tolist())[1:]) for record in records]
+        self.assertEqual(totals, [score for rolled in scores for score in rolled.values()])
+
+    def test_replay_detects_tampered_record(self):
+        roller = DiceRoller(self.log)
+        roller.roll_ability_scores("Арвен")
+        records = self.log.query(session=roller.session)
+        records["dice"][2][0] = records["dice"][2][0] % 6 + 1
+        self.assertEqual(replay_session(records), 1)
+
+    def test_replay_with_gaps_from_character_filter(self):
+        roller = DiceRoller(self.log)
+        for name in ("Арвен", "Борин", "Арвен", "Борин", "Борин", "Арвен"):
+            roller.roll_ability_scores(name)
+
+        for name in ("Арвен", "Борин"):
+            records = self.log.query(character_name=name)
+            self.assertEqual(len(records), 18)
+            self.assertEqual(replay_session(records), 0)
+
+    def test_sessions_are_told_apart(self):
+        first, second = DiceRoller(self.log), DiceRoller(self.log)
+        first.roll_ability_scores("Арвен")
+        second.roll_ability_scores("Арвен")
+        second.roll_ability_scores("Арвен")
+
+        self.assertNotEqual(first.session, second.session)
+        self.assertEqual(len(self.log.query(session=first.session)), 6)
+        self.assertEqual(len(self.log.query(session=second.session)), 12)
+        self.assertTrue(np.all(self.log.query(session=second.session)["seed"] == second.seed))
+
+    def test_fixed_seed_differs_per_session(self):
+        with mock.patch.dict(os.environ, {"ROLL_SEED": "42"}):
+            with mock.patch("roll_log._seed_counter", iter(range(3))):
+                seeds = [new_session_seed() for _ in range(3)]
+            with mock.patch("roll_log._seed_counter", iter(range(3))):
+                self.assertEqual([new_session_seed() for _ in range(3)], seeds)
+        self.assertEqual(len(set(seeds)), 3)
+
+    def test_partial_trailing_record_is_ignored(self):
+        DiceRoller(self.log).roll_ability_scores("Арвен")
+        with open(self.path, 'ab') as f:
+            f.write(b"\x00" * (RECORD.size - 1))
+        self.assertEqual(len(self.log.read()), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
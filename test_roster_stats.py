@@ -0,0 +1,93 @@
+"""Checks of the incremental roster aggregates against a full rebuild.
+
+Usage:
+    python -m unittest test_roster_stats
+"""
+import os
+import random
+import tempfile
+import unittest
+
+from character import Character
+from character_cache import CharacterCache
+from character_codec import FORMAT_EXTENSIONS, encode_character
+from character_schema import ABILITIES
+from data_manager import DataManager
+from dnd_data import races, classes, backgrounds
+from roster_stats import RosterAggregates
+
+
+def comparable(summary):
+    """Summary with NumPy histograms converted to lists."""
+    return dict(summary, score_histograms={ability: histogram.tolist()
+                                           for ability, histogram in summary["score_histograms"].items()})
+
+
+class RosterAggregatesTest(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.data_dir = os.path.join(temp_dir.name, "character_data")
+        self.cache = CharacterCache()
+
+    def data_manager(self, storage_format="json"):
+        return DataManager(self.data_dir, cache=self.cache, storage_format=storage_format)
+
+    def assert_matches_rebuild(self, data_manager):
+        rebuilt = RosterAggregates(capacity=1)
+        rebuilt.rebuild(data_manager._list_characters())
+        self.assertTrue(data_manager.aggregates.is_current(data_manager._file_versions()))
+        self.assertEqual(comparable(data_manager.aggregates.summary()), comparable(rebuilt.summary()))
+
+    def test_random_saves_and_deletes_match_rebuild(self):
+        rng = random.Random(0)
+        names = [f"Персонаж {index}" for index in range(12)]
+        self.data_manager().get_roster_aggregates()
+
+        for _ in range(400):
+            data_manager = self.data_manager(rng.choice(list(FORMAT_EXTENSIONS)))
+            name = rng.choice(names)
+            if rng.random() < 0.3:
+                data_manager.delete_character(name)
+            else:
+                self.assertTrue(data_manager.save_character(Character(
+                    name=name,
+                    race=rng.choice(list(races)),
+                    character_class=rng.choice(list(classes)),
+                    background=rng.choice(list(backgrounds)),
+                    ability_scores={ability: rng.randint(3, 18) for ability in ABILITIES}
+                )))
+            self.assert_matches_rebuild(data_manager)
+
+    def test_external_overwrite_triggers_rebuild(self):
+        data_manager = self.data_manager()
+        character = Character(name="Арвен", race=list(races)[0], character_class=list(classes)[0],
+                              background=list(backgrounds)[0], ability_scores={ability: 10 for ability in ABILITIES})
+        data_manager.save_character(character)
+        self.assertEqual(data_manager.get_roster_aggregates().summary()["class_counts"][list(classes)[0]], 1)
+
+        # Another process rewrites the file in place with a different class
+        other = dict(character.to_dict(), character_class=list(classes)[1])
+        with open(os.path.join(self.data_dir, "Арвен.json"), 'r+b') as f:
+            f.truncate(0)
+            f.write(encode_character(other, "json"))
+
+        class_counts = data_manager.get_roster_aggregates().summary()["class_counts"]
+        self.assertEqual((class_counts[list(classes)[0]], class_counts[list(classes)[1]]), (0, 1))
+
+    def test_file_stem_differs_from_name(self):
+        data_manager = self.data_manager()
+        data_manager.get_roster_aggregates()
+        character = Character(name="Арвен", race=list(races)[0], character_class=list(classes)[0],
+                              background=list(backgrounds)[0], ability_scores={ability: 10 for ability in ABILITIES})
+        data_manager.save_character(character)
+        os.replace(os.path.join(self.data_dir, "Арвен.json"), os.path.join(self.data_dir, "Восстановлен.json"))
+        self.assertEqual(data_manager.get_roster_aggregates().size, 1)
+
+        os.remove(os.path.join(self.data_dir, "Восстановлен.json"))
+        self.assertEqual(data_manager.get_roster_aggregates().size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()